@@ -0,0 +1,242 @@
+"""Append-only change log for reminders and todos, written behind the request.
+
+Handlers call ``AuditLog.record`` which only appends to an in-memory buffer and
+a local spool file. Buffered events are written to MongoDB with one
+``insert_many`` when the buffer reaches ``batch_size`` or when the periodic
+flush runs, so auditing adds no database round trip to write requests.
+
+The spool file always holds every event not yet confirmed in MongoDB. Each
+process spools to its own file, ``AUDIT_SPOOL_PATH`` with the pid inserted
+(``audit_spool.<pid>.jsonl``), and holds an exclusive lock on its ``.lock``
+file while running. When a process opens its spool it takes over the spools
+whose lock is free, i.e. those left by crashed processes, and buffers their
+events again. Each event carries a fixed ``_id``, so replaying an already
+inserted event is a no-op.
+"""
+
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 100))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", 2))
+AUDIT_SPOOL_PATH = os.getenv("AUDIT_SPOOL_PATH", "audit_spool.jsonl")
+# fsync every spooled event; slower, but survives power loss and not just a crash
+AUDIT_SPOOL_FSYNC = os.getenv("AUDIT_SPOOL_FSYNC", "false").lower() == "true"
+# While MongoDB rejects flushes, the oldest events beyond this many are dropped
+AUDIT_MAX_BUFFERED = int(os.getenv("AUDIT_MAX_BUFFERED", 50000))
+
+def _try_lock(path):
+    """Open and exclusively lock a lock file; return it, or None if held elsewhere."""
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+class AuditLog:
+    def __init__(self, get_collection, spool_path=AUDIT_SPOOL_PATH,
+                 batch_size=AUDIT_BATCH_SIZE, fsync=AUDIT_SPOOL_FSYNC,
+                 max_buffered=AUDIT_MAX_BUFFERED, owner=None):
+        self._get_collection = get_collection
+        self.base_spool_path = spool_path
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.max_buffered = max_buffered
+        # Distinguishes this process's spool; the pid is read on first use so
+        # workers forked after import each get their own
+        self.owner = owner
+        self.spool_path = None
+        self._buffer = []
+        self._spool = None
+        self._spool_lock = None
+        self._flush_requested = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _spool_path_for(self, owner):
+        root, ext = os.path.splitext(self.base_spool_path)
+        return f"{root}.{owner}{ext}"
+
+    def _open_spool(self):
+        # Called with self._lock held
+        self.spool_path = self._spool_path_for(self.owner or os.getpid())
+        self._spool_lock = _try_lock(self.spool_path + ".lock")
+        if self._spool_lock is None:
+            raise RuntimeError(f"Audit spool {self.spool_path} is in use by another process")
+        self._read_spool(self.spool_path)
+        self._spool = open(self.spool_path, "a")
+        self._claim_orphaned_spools()
+
+    def _read_spool(self, path):
+        if not os.path.exists(path):
+            return []
+        events = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    events.append(json.loads(line))
+        self._buffer.extend(events)
+        return events
+
+    def _claim_orphaned_spools(self):
+        # Spools of processes that died without flushing; a spool created
+        # before per-process spools existed has the base path
+        root, ext = os.path.splitext(self.base_spool_path)
+        paths = set(glob.glob(glob.escape(root) + ".*" + ext)) | {self.base_spool_path}
+        for path in sorted(paths - {self.spool_path}):
+            lock_file = _try_lock(path + ".lock")
+            if lock_file is None:
+                continue  # owned by a running process
+            try:
+                events = self._read_spool(path)
+                if events:
+                    for event in events:
+                        self._spool.write(json.dumps(event) + "\n")
+                    self._spool.flush()
+                    os.fsync(self._spool.fileno())
+                    logger.info("Recovered %d audit events from %s", len(events), path)
+                if os.path.exists(path):
+                    os.remove(path)
+                os.remove(path + ".lock")
+            finally:
+                lock_file.close()
+
+    def _write_spool(self, event):
+        self._spool.write(json.dumps(event) + "\n")
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+
+    def _rewrite_spool(self):
+        # Called with self._lock held: replace the spool with the buffer
+        self._spool.close()
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for event in self._buffer:
+                f.write(json.dumps(event) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, "a")
+
+    def _trim(self):
+        # Called with self._lock held and no flush in flight
+        if len(self._buffer) <= self.max_buffered:
+            return
+        # Drop a tenth more than needed so the spool is not rewritten per event
+        dropped = len(self._buffer) - self.max_buffered + self.max_buffered // 10
+        del self._buffer[:dropped]
+        self._rewrite_spool()
+        logger.error("Audit buffer full, dropped the %d oldest events", dropped)
+
+    def record(self, user_id, entity_type, entity_id, action, changes=None):
+        """Buffer one change event.
+
+        Returns True when the buffer reached batch_size and the caller should
+        schedule a flush; only once until a flush succeeds, since the
+        periodic flush retries failed ones.
+        """
+        event = {
+            "_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": dict(changes or {}),
+            "at": datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            if self._spool is None:
+                self._open_spool()
+            self._buffer.append(event)
+            self._write_spool(event)
+            if not self._flush_lock.locked():
+                # A failing flush applies the cap itself when it requeues
+                self._trim()
+            if len(self._buffer) >= self.batch_size and not self._flush_requested:
+                self._flush_requested = True
+                return True
+            return False
+
+    def pending(self, entity_id):
+        """Return buffered events for an entity that are not in MongoDB yet."""
+        with self._lock:
+            return [dict(e) for e in self._buffer if e["entity_id"] == entity_id]
+
+    def flush(self):
+        """Write buffered events to MongoDB and shrink the spool.
+
+        Returns the number of events flushed. On failure the events stay
+        buffered and spooled for the next attempt.
+        """
+        from pymongo.errors import BulkWriteError
+
+        with self._flush_lock:
+            with self._lock:
+                if self._spool is None:
+                    self._open_spool()
+                events = self._buffer
+                self._buffer = []
+            if not events:
+                return 0
+
+            try:
+                self._get_collection().insert_many(events, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate keys are events replayed from the spool after a crash
+                if any(err["code"] != 11000 for err in e.details["writeErrors"]):
+                    self._requeue(events)
+                    raise
+            except Exception:
+                self._requeue(events)
+                raise
+
+            with self._lock:
+                # Keep only the events recorded meanwhile
+                self._rewrite_spool()
+                self._flush_requested = False
+            return len(events)
+
+    def try_flush(self):
+        """Flush, logging instead of raising; for background callers."""
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception("Audit log flush failed; events remain in the spool")
+            return 0
+
+    def _requeue(self, events):
+        with self._lock:
+            self._buffer = events + self._buffer
+            self._trim()
+
+    def close(self):
+        """Release this process's spool; unflushed events stay in it."""
+        with self._lock:
+            if self._spool is None:
+                return
+            self._spool.close()
+            if not self._buffer:
+                os.remove(self.spool_path)
+                os.remove(self.spool_path + ".lock")
+            self._spool_lock.close()
+            self._spool = self._spool_lock = None
+
+    async def flush_periodically(self, interval_seconds=AUDIT_FLUSH_INTERVAL_SECONDS):
+        """Flush the buffer forever, off the event loop, every interval."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await loop.run_in_executor(None, self.try_flush)
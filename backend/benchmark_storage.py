@@ -0,0 +1,167 @@
+"""Compare the MongoDB and SQLite storage backends on the app's hot paths.
+
+    python benchmark_storage.py [--users 50] [--items 200] [--ops 2000] [--threads 8]
+                                [--backend mongo --backend sqlite]
+
+Each workload issues the same queries the API handlers do, from a pool of
+threads like FastAPI's: ``list`` (a user's reminders sorted by datetime and
+todos sorted by rank), ``create`` (insert a reminder) and ``update`` (toggle a
+todo with the pipeline update and PUT a reminder). Mongo runs against a
+throwaway ``daily_reminder_benchmark`` database on MONGO_URL and is skipped
+when no server answers; SQLite uses a temporary file.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BENCHMARK_DB_NAME = "daily_reminder_benchmark"
+
+def open_mongo():
+    """Return (db, cleanup) for a throwaway Mongo database, or None if unreachable."""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    client = MongoClient(os.getenv("MONGO_URL"), serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        print(f"Skipping mongo: {e.__class__.__name__}")
+        client.close()
+        return None
+    client.drop_database(BENCHMARK_DB_NAME)
+
+    def cleanup():
+        client.drop_database(BENCHMARK_DB_NAME)
+        client.close()
+    return client[BENCHMARK_DB_NAME], cleanup
+
+def open_sqlite():
+    from sqlite_store import SQLiteDatabase
+
+    directory = tempfile.mkdtemp()
+    db = SQLiteDatabase(os.path.join(directory, "benchmark.db"))
+
+    def cleanup():
+        db.close()
+        shutil.rmtree(directory)
+    return db, cleanup
+
+BACKENDS = {"mongo": open_mongo, "sqlite": open_sqlite}
+
+def seed(db, users, items):
+    """Create the app's indexes and ``items`` reminders and todos per user."""
+    db.reminders.create_index([("user_id", 1), ("datetime", 1)])
+    db.reminders.create_index([("user_id", 1), ("reminder_id", 1)])
+    db.todos.create_index([("user_id", 1), ("rank", 1)])
+    db.todos.create_index([("user_id", 1), ("todo_id", 1)])
+
+    start = datetime(2026, 1, 1)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    reminder_ids, todo_ids = {}, {}
+    for user_id in user_ids:
+        reminders = [{
+            "reminder_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": f"Reminder {i}",
+            "datetime": (start + timedelta(hours=7 * i)).isoformat(),
+            "priority": random.choice(("Low", "Medium", "High")),
+            "recurrence": None,
+            "completed": False
+        } for i in range(items)]
+        todos = [{
+            "todo_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": f"Todo {i}",
+            "completed": False,
+            "rank": f"{i:06d}",
+            "created_at": start.isoformat()
+        } for i in range(items)]
+        db.reminders.insert_many(reminders)
+        db.todos.insert_many(todos)
+        reminder_ids[user_id] = [r["reminder_id"] for r in reminders]
+        todo_ids[user_id] = [t["todo_id"] for t in todos]
+    return user_ids, reminder_ids, todo_ids
+
+def make_workloads(db, user_ids, reminder_ids, todo_ids):
+    from pymongo import ReturnDocument
+
+    def list_items():
+        user_id = random.choice(user_ids)
+        list(db.reminders.find({"user_id": user_id}, {"_id": 0}).sort("datetime", 1))
+        list(db.todos.find({"user_id": user_id}, {"_id": 0}).sort([("rank", 1), ("created_at", -1)]))
+
+    def create():
+        db.reminders.insert_one({
+            "reminder_id": str(uuid.uuid4()),
+            "user_id": random.choice(user_ids),
+            "title": "New reminder",
+            "datetime": datetime.utcnow().isoformat(),
+            "priority": "Medium",
+            "recurrence": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "completed": False
+        })
+
+    def update():
+        user_id = random.choice(user_ids)
+        db.todos.find_one_and_update(
+            {"todo_id": random.choice(todo_ids[user_id]), "user_id": user_id},
+            [{"$set": {"completed": {"$not": "$completed"}, "updated_at": datetime.utcnow().isoformat()}}],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        db.reminders.update_one(
+            {"reminder_id": random.choice(reminder_ids[user_id]), "user_id": user_id},
+            {"$set": {"title": "Updated", "updated_at": datetime.utcnow().isoformat()}}
+        )
+
+    return {"list": list_items, "create": create, "update": update}
+
+def run_workload(operation, ops, threads):
+    """Run ``operation`` ``ops`` times; return (ops/sec, p50 ms, p99 ms)."""
+    def timed(_):
+        started = time.perf_counter()
+        operation()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(timed, range(ops)))
+    elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return ops / elapsed, quantiles[49] * 1000, quantiles[98] * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the storage backends")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--items", type=int, default=200, help="reminders and todos per user")
+    parser.add_argument("--ops", type=int, default=2000, help="operations per workload")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'workload':<8} {'ops/sec':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name in args.backend or ["mongo", "sqlite"]:
+        opened = BACKENDS[name]()
+        if opened is None:
+            continue
+        db, cleanup = opened
+        try:
+            workloads = make_workloads(db, *seed(db, args.users, args.items))
+            for workload, operation in workloads.items():
+                throughput, p50, p99 = run_workload(operation, args.ops, args.threads)
+                print(f"{name:<8} {workload:<8} {throughput:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+        finally:
+            cleanup()
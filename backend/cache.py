@@ -0,0 +1,142 @@
+"""In-process cache of per-user list results with write-through invalidation.
+
+Entries are keyed by ``(user_id, kind, params)`` where ``kind`` is the
+collection a result was read from ("reminders" or "todos"). The cache is
+bounded by the approximate JSON size of the cached results rather than by
+entry count, and evicts least recently used entries first.
+
+Write handlers call ``invalidate(user_id, kind)`` after a successful write.
+That drops the user's entries of that kind locally and publishes the
+invalidation on a bus so caches in other worker processes drop theirs too.
+``LocalInvalidationBus`` delivers in-process and stands in for a shared
+pub/sub channel in tests and single-worker deployments.
+
+Callers read ``generation`` before querying the database and pass it to
+``put``; if the same user's list of that kind was invalidated in between, the
+possibly stale result is not stored. Writes by other users do not affect it.
+"""
+
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+LIST_CACHE_MAX_BYTES = int(os.getenv("LIST_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# How many (user_id, kind) invalidations are remembered for put's staleness check
+INVALIDATION_HISTORY = 100000
+
+class LocalInvalidationBus:
+    """Delivers invalidations to every cache subscribed in this process."""
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def publish(self, origin, user_id, kind):
+        for callback in list(self._subscribers):
+            callback(origin, user_id, kind)
+
+class ListCache:
+    def __init__(self, max_bytes=LIST_CACHE_MAX_BYTES, bus=None):
+        self.max_bytes = max_bytes
+        self.bus = bus
+        self.cache_id = str(uuid.uuid4())
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._keys_by_user = {}  # (user_id, kind) -> set of keys
+        self._bytes = 0
+        self.generation = 0
+        # (user_id, kind) -> generation of its last invalidation, oldest first.
+        # Older records are forgotten; _floor is the newest forgotten one.
+        self._invalidated = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        if bus is not None:
+            bus.subscribe(self._on_remote_invalidation)
+
+    def get(self, user_id, kind, params=()):
+        """Return the cached result, or None on a miss."""
+        key = (user_id, kind, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_id, kind, params, value, generation):
+        """Cache a result read while the cache was at ``generation``.
+
+        Results larger than the whole cache are not stored.
+        """
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        key = (user_id, kind, params)
+        with self._lock:
+            if self._invalidated.get((user_id, kind), self._floor) > generation:
+                return
+            self._remove(key)
+            while self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[key] = (value, size)
+            self._keys_by_user.setdefault((user_id, kind), set()).add(key)
+            self._bytes += size
+
+    def invalidate(self, user_id, kind):
+        """Drop a user's cached results of one kind here and in other workers."""
+        self._drop(user_id, kind)
+        if self.bus is not None:
+            self.bus.publish(self.cache_id, user_id, kind)
+
+    def _on_remote_invalidation(self, origin, user_id, kind):
+        if origin != self.cache_id:
+            self._drop(user_id, kind)
+
+    def _drop(self, user_id, kind):
+        with self._lock:
+            keys = self._keys_by_user.pop((user_id, kind), ())
+            for key in keys:
+                self._remove(key)
+            self.generation += 1
+            self.invalidations += 1
+            self._invalidated[(user_id, kind)] = self.generation
+            self._invalidated.move_to_end((user_id, kind))
+            if len(self._invalidated) > INVALIDATION_HISTORY:
+                _, self._floor = self._invalidated.popitem(last=False)
+
+    def _remove(self, key):
+        # Called with self._lock held
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        user_keys = self._keys_by_user.get(key[:2])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[key[:2]]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,275 @@
+"""Offline job building each user's morning digest of reminders and open todos.
+
+    python digest.py [--date YYYY-MM-DD] [--chunk-size 500] [--workers 4]
+                     [--sink stdout | --sink file:digests.jsonl | --sink mongo]
+                     [--checkpoint digest_checkpoint.json]
+
+Users are streamed from the ``users`` collection in ``user_id`` order, one
+chunk at a time. For each chunk a single aggregation per shard returns the
+day's reminders (recurring ones are fetched too and expanded here) together
+with open todos. Digests are rendered in a process pool and handed to the
+sink. After every chunk the last user_id is saved to the checkpoint file, so
+an interrupted run for the same date continues where it stopped.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+DIGEST_CHUNK_SIZE = int(os.getenv("DIGEST_CHUNK_SIZE", 500))
+DIGEST_WORKERS = int(os.getenv("DIGEST_WORKERS", os.cpu_count() or 1))
+DIGEST_CHECKPOINT_PATH = os.getenv("DIGEST_CHECKPOINT_PATH", "digest_checkpoint.json")
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+def occurs_on(reminder, day):
+    """Return the reminder's ISO datetime on ``day``, or None if it does not occur.
+
+    ``day`` is a ``date``. One-off reminders occur on their own date;
+    recurring ones repeat from their first date on: daily, weekly on the same
+    weekday, monthly on the same day of the month, or custom on the weekdays
+    named in ``recurrence_days``.
+    """
+    try:
+        start = datetime.fromisoformat(reminder["datetime"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if start.date() > day:
+        return None
+
+    recurrence = reminder.get("recurrence")
+    if recurrence is None:
+        occurs = start.date() == day
+    elif recurrence == "daily":
+        occurs = True
+    elif recurrence == "weekly":
+        occurs = start.weekday() == day.weekday()
+    elif recurrence == "monthly":
+        occurs = start.day == day.day
+    elif recurrence == "custom":
+        days = {d.strip().lower()[:3] for d in reminder.get("recurrence_days") or []}
+        occurs = WEEKDAYS[day.weekday()] in days
+    else:
+        occurs = False
+    if not occurs:
+        return None
+    return datetime.combine(day, start.time()).isoformat()
+
+def build_pipeline(user_ids, day):
+    """Return the aggregation fetching a chunk's open reminders and todos.
+
+    It runs on the reminders collection of one shard and unions in that
+    shard's todos, grouped into one document per user.
+    """
+    day_start = day.isoformat()
+    day_end = (day + timedelta(days=1)).isoformat()
+    return [
+        {"$match": {
+            "user_id": {"$in": user_ids},
+            "completed": {"$ne": True},
+            "datetime": {"$lt": day_end},
+            "$or": [
+                {"datetime": {"$gte": day_start}},
+                {"recurrence": {"$ne": None}}
+            ]
+        }},
+        {"$project": {
+            "_id": 0, "kind": "reminder", "user_id": 1, "title": 1, "datetime": 1,
+            "priority": 1, "recurrence": 1, "recurrence_days": 1
+        }},
+        {"$unionWith": {"coll": "todos", "pipeline": [
+            {"$match": {"user_id": {"$in": user_ids}, "completed": {"$ne": True}}},
+            {"$project": {"_id": 0, "kind": "todo", "user_id": 1, "title": 1, "rank": 1}}
+        ]}},
+        {"$group": {"_id": "$user_id", "items": {"$push": "$$ROOT"}}}
+    ]
+
+def fetch_chunk(router, users, day):
+    """Return render payloads for a chunk of user documents."""
+    by_shard = {}
+    for user in users:
+        by_shard.setdefault(router.shard_of(user), []).append(user["user_id"])
+
+    items = {}
+    for shard, user_ids in by_shard.items():
+        for row in router.db(shard).reminders.aggregate(build_pipeline(user_ids, day)):
+            items[row["_id"]] = row["items"]
+
+    return [
+        {
+            "user_id": user["user_id"],
+            "email": user.get("email"),
+            "full_name": user.get("full_name"),
+            "date": day.isoformat(),
+            "items": items.get(user["user_id"], [])
+        }
+        for user in users
+    ]
+
+def render_digest(payload):
+    """Render one user's digest; runs in a worker process."""
+    day = date.fromisoformat(payload["date"])
+    reminders = []
+    todos = []
+    for item in payload["items"]:
+        if item["kind"] == "reminder":
+            at = occurs_on(item, day)
+            if at is not None:
+                reminders.append({"title": item["title"], "datetime": at, "priority": item.get("priority")})
+        else:
+            todos.append(item)
+    reminders.sort(key=lambda r: r["datetime"])
+    todos.sort(key=lambda t: t.get("rank") or "")
+
+    lines = [f"Good morning {payload['full_name'] or ''}".rstrip() + "!", ""]
+    if reminders:
+        lines.append(f"Today's reminders ({len(reminders)}):")
+        for r in reminders:
+            priority = f" [{r['priority']}]" if r["priority"] else ""
+            lines.append(f"  {r['datetime'][11:16]}  {r['title']}{priority}")
+    else:
+        lines.append("No reminders today.")
+    if todos:
+        lines.append("")
+        lines.append(f"Open tasks ({len(todos)}):")
+        lines.extend(f"  - {t['title']}" for t in todos)
+
+    return {
+        "user_id": payload["user_id"],
+        "email": payload["email"],
+        "date": payload["date"],
+        "reminders": len(reminders),
+        "todos": len(todos),
+        "text": "\n".join(lines)
+    }
+
+class StdoutSink:
+    def write(self, digests):
+        for digest in digests:
+            print(f"--- {digest['email']} ({digest['date']})")
+            print(digest["text"])
+
+    def close(self):
+        pass
+
+class JsonlFileSink:
+    """Appends one JSON line per digest; re-runs of a chunk may repeat lines."""
+
+    def __init__(self, path):
+        self._file = open(path, "a")
+
+    def write(self, digests):
+        for digest in digests:
+            self._file.write(json.dumps(digest) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class MongoSink:
+    """Upserts digests into a collection keyed by (user_id, date)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        collection.create_index([("user_id", 1), ("date", 1)], unique=True)
+
+    def write(self, digests):
+        from pymongo import ReplaceOne
+
+        if digests:
+            self.collection.bulk_write([
+                ReplaceOne({"user_id": d["user_id"], "date": d["date"]}, d, upsert=True)
+                for d in digests
+            ], ordered=False)
+
+    def close(self):
+        pass
+
+def load_checkpoint(path, day):
+    """Return the last user_id processed for ``day``, or None to start over."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("date") != day.isoformat():
+        return None
+    return checkpoint.get("last_user_id")
+
+def save_checkpoint(path, day, last_user_id):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"date": day.isoformat(), "last_user_id": last_user_id}, f)
+    os.replace(tmp_path, path)
+
+def stream_users(users, after_user_id, chunk_size):
+    """Yield chunks of user documents in user_id order after a checkpoint."""
+    while True:
+        query = {"user_id": {"$gt": after_user_id}} if after_user_id else {}
+        chunk = list(users.find(
+            query,
+            {"_id": 0, "user_id": 1, "email": 1, "full_name": 1, "shard": 1}
+        ).sort("user_id", 1).limit(chunk_size))
+        if not chunk:
+            return
+        yield chunk
+        after_user_id = chunk[-1]["user_id"]
+
+def run_digest(users, router, sink, day, chunk_size=DIGEST_CHUNK_SIZE,
+               workers=DIGEST_WORKERS, checkpoint_path=DIGEST_CHECKPOINT_PATH, log=print):
+    """Build and write digests for every user; returns the number of users done."""
+    last_user_id = load_checkpoint(checkpoint_path, day)
+    if last_user_id:
+        log(f"Resuming after user {last_user_id}")
+
+    done = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in stream_users(users, last_user_id, chunk_size):
+            payloads = fetch_chunk(router, chunk, day)
+            chunksize = max(1, len(payloads) // (workers * 4))
+            sink.write(list(pool.map(render_digest, payloads, chunksize=chunksize)))
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, day, chunk[-1]["user_id"])
+            done += len(chunk)
+            elapsed = time.perf_counter() - started
+            log(f"{done} users, {done / elapsed:.1f} users/sec")
+    return done
+
+def make_sink(spec, get_db):
+    if spec == "stdout":
+        return StdoutSink()
+    if spec == "mongo":
+        return MongoSink(get_db().digests)
+    if spec.startswith("file:"):
+        return JsonlFileSink(spec[len("file:"):])
+    raise ValueError(f"Unknown sink {spec!r}, expected stdout, mongo or file:PATH")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build daily reminder digests for all users")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--chunk-size", type=int, default=DIGEST_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=DIGEST_WORKERS)
+    parser.add_argument("--sink", default="stdout")
+    parser.add_argument("--checkpoint", default=DIGEST_CHECKPOINT_PATH)
+    args = parser.parse_args()
+
+    from server import get_db, shard_router
+
+    sink = make_sink(args.sink, get_db)
+    started = time.perf_counter()
+    try:
+        # Progress goes to stderr so the stdout sink stays clean
+        done = run_digest(
+            get_db().users, shard_router, sink, args.date,
+            chunk_size=args.chunk_size, workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            log=lambda message: print(message, file=sys.stderr)
+        )
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - started
+    print(f"Built {done} digests in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} users/sec)", file=sys.stderr)
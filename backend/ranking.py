@@ -0,0 +1,134 @@
+"""Lexicographic ranks for manually ordered lists.
+
+Items are shown sorted by rank, and moving an item only needs a new rank
+between its two new neighbours, so a reorder rewrites a single document
+instead of renumbering the whole list.
+
+A rank is a base-62 string (``0-9A-Za-z``, which sorts the same bytewise as
+in MongoDB and SQLite) made of a variable-length integer part and an optional
+fraction. The first character gives the integer's length: ``a``-``z`` for
+non-negative integers of 2-27 characters, ``A``-``Z`` for negative ones. The
+first rank is ``a0``. Adding at either end of a list steps the integer part,
+so a rank grows by one character only every ~62^k inserts; inserting between
+two neighbours extends the fraction.
+"""
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+INTEGER_ZERO = "a0"
+# Reserved so there is always room before the smallest integer
+SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+def _integer_length(head):
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Invalid rank head {head!r}")
+
+def _split(rank):
+    """Return a rank's integer part and fraction."""
+    length = _integer_length(rank[0])
+    if length > len(rank):
+        raise ValueError(f"Invalid rank {rank!r}")
+    return rank[:length], rank[length:]
+
+def _validate(rank):
+    if not rank or any(c not in DIGITS for c in rank) or rank == SMALLEST_INTEGER:
+        raise ValueError(f"Invalid rank {rank!r}")
+    if _split(rank)[1].endswith(DIGITS[0]):
+        raise ValueError(f"Invalid rank {rank!r}")
+
+def _midpoint(lower, upper):
+    """Return a fraction strictly between two fractions (upper None = 1)."""
+    if upper is not None:
+        # Skip the common prefix, treating a missing lower digit as 0
+        n = 0
+        while (lower[n] if n < len(lower) else DIGITS[0]) == upper[n]:
+            n += 1
+        if n > 0:
+            return upper[:n] + _midpoint(lower[n:], upper[n:])
+    lo = DIGITS.index(lower[0]) if lower else 0
+    hi = DIGITS.index(upper[0]) if upper is not None else len(DIGITS)
+    if hi - lo > 1:
+        return DIGITS[(lo + hi + 1) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[lo] + _midpoint(lower[1:], None)
+
+def _increment_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+    # Carried out of the top digit: switch to the next integer length
+    if head == "Z":
+        return INTEGER_ZERO
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def _decrement_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def rank_between(lower=None, upper=None):
+    """Return a rank that sorts strictly between lower and upper.
+
+    Either bound may be None for the start or end of the list. Raises
+    ValueError if a bound is not a valid rank or lower does not sort before
+    upper.
+    """
+    for rank in (lower, upper):
+        if rank is not None:
+            _validate(rank)
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f"lower rank {lower!r} must sort before upper rank {upper!r}")
+
+    if lower is None:
+        if upper is None:
+            return INTEGER_ZERO
+        integer, fraction = _split(upper)
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if integer < upper:
+            return integer
+        decremented = _decrement_integer(integer)
+        if decremented is None:
+            raise ValueError("No rank left before the smallest integer")
+        return decremented
+
+    integer, fraction = _split(lower)
+    if upper is None:
+        incremented = _increment_integer(integer)
+        return integer + _midpoint(fraction, None) if incremented is None else incremented
+
+    upper_integer, upper_fraction = _split(upper)
+    if integer == upper_integer:
+        return integer + _midpoint(fraction, upper_fraction)
+    incremented = _increment_integer(integer)
+    if incremented is not None and incremented < upper:
+        return incremented
+    return integer + _midpoint(fraction, None)
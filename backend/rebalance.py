@@ -0,0 +1,119 @@
+"""Move users' reminders and todos to the shard the hash ring now assigns them.
+
+Run after adding shards to MONGO_SHARDS (with the servers already using the
+new configuration)::
+
+    python rebalance.py [--dry-run]
+
+Users are moved in batches while the app keeps serving everyone else. A batch
+is first marked ``moving`` on the user documents, which makes the API answer
+503 for those users, and the tool waits ``REBALANCE_GRACE_SECONDS`` so
+requests that loaded a user before the mark have finished. Each user's
+documents are then copied to the target shard (replacing copies left by an
+interrupted run) and compared with the source. Only if both shards hold the
+same documents is ``users.shard`` switched, the mark cleared and the source
+copies deleted; otherwise the move is aborted and the user stays on the
+source shard. Documents keep their ``_id``, so an interrupted run can simply
+be re-run.
+"""
+
+import os
+import sys
+import time
+
+SHARDED_COLLECTIONS = ("reminders", "todos", "reminders_archive", "todos_archive")
+
+# Longer than any request takes, so none still writes to the source shard
+REBALANCE_GRACE_SECONDS = float(os.getenv("REBALANCE_GRACE_SECONDS", 5))
+REBALANCE_BATCH_SIZE = int(os.getenv("REBALANCE_BATCH_SIZE", 100))
+
+class MoveAborted(Exception):
+    """The source shard changed during a move; the user was not moved."""
+
+def _user_docs(db, user_id):
+    return {
+        name: sorted(db[name].find({"user_id": user_id}), key=lambda doc: doc["_id"])
+        for name in SHARDED_COLLECTIONS
+    }
+
+def _replace_user_docs(db, user_id, docs_by_collection):
+    for name, docs in docs_by_collection.items():
+        db[name].delete_many({"user_id": user_id})
+        if docs:
+            db[name].insert_many([dict(doc) for doc in docs], ordered=False)
+
+def mark_moving(users, user_ids, moving=True):
+    for user_id in user_ids:
+        users.update_one({"user_id": user_id}, {"$set": {"moving": moving}})
+
+def move_user(router, users, user_id, source, target):
+    """Move one user's documents from the source shard to the target shard.
+
+    The user must already be marked moving, with the grace period passed.
+    Returns the number of documents moved. Raises MoveAborted, with the user
+    left on the source shard and unmarked, if the source changed meanwhile.
+    """
+    source_db, target_db = router.db(source), router.db(target)
+    docs = _user_docs(source_db, user_id)
+    # The target does not serve this user yet, so its copies can be replaced
+    _replace_user_docs(target_db, user_id, docs)
+
+    if _user_docs(source_db, user_id) != docs or _user_docs(target_db, user_id) != docs:
+        _replace_user_docs(target_db, user_id, {name: [] for name in SHARDED_COLLECTIONS})
+        mark_moving(users, [user_id], False)
+        raise MoveAborted(f"documents of {user_id} changed on {source} during the move")
+
+    users.update_one({"user_id": user_id}, {"$set": {"shard": target, "moving": False}})
+    for name in SHARDED_COLLECTIONS:
+        source_db[name].delete_many({"user_id": user_id})
+    return sum(len(batch) for batch in docs.values())
+
+def rebalance(router, users, dry_run=False, log=print,
+              grace_seconds=REBALANCE_GRACE_SECONDS, batch_size=REBALANCE_BATCH_SIZE):
+    """Move every user whose shard differs from its ring placement.
+
+    Returns a dict with the number of users checked, moved and aborted and
+    the documents moved.
+    """
+    summary = {"users": 0, "moved": 0, "aborted": 0, "documents": 0}
+    pending = []
+    for user in users.find({}, {"_id": 0, "user_id": 1, "shard": 1, "moving": 1}):
+        summary["users"] += 1
+        source = router.shard_of(user)
+        target = router.placement_for(user["user_id"])
+        if source == target:
+            if user.get("moving") and not dry_run:
+                # Marked by an interrupted run whose target is no longer wanted
+                mark_moving(users, [user["user_id"]], False)
+            continue
+        if dry_run:
+            summary["moved"] += 1
+            log(f"would move {user['user_id']}: {source} -> {target}")
+            continue
+        pending.append((user["user_id"], source, target))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        mark_moving(users, [user_id for user_id, _, _ in batch])
+        time.sleep(grace_seconds)
+        for user_id, source, target in batch:
+            try:
+                summary["documents"] += move_user(router, users, user_id, source, target)
+            except MoveAborted as e:
+                summary["aborted"] += 1
+                log(f"aborted {user_id}: {e}")
+                continue
+            summary["moved"] += 1
+            log(f"moved {user_id}: {source} -> {target}")
+    return summary
+
+if __name__ == "__main__":
+    from server import get_db, shard_router
+
+    started = time.perf_counter()
+    summary = rebalance(shard_router, get_db().users, dry_run="--dry-run" in sys.argv)
+    print(
+        f"Checked {summary['users']} users, moved {summary['moved']} "
+        f"({summary['documents']} documents), aborted {summary['aborted']} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
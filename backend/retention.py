@@ -0,0 +1,217 @@
+"""Retention policy: move finished reminders and todos to archive collections.
+
+Expired one-off reminders, completed reminders and completed todos are moved
+in batches from the hot ``reminders``/``todos`` collections to
+``reminders_archive``/``todos_archive`` so the per-user list queries only scan
+live items. Archived documents keep their ``_id``, which makes a batch safe to
+re-run after a crash between the archive insert and the hot delete. A
+document is only removed from the hot collection if it still matches the
+archive query and has not been updated since it was copied; otherwise it
+stays live and its archived copy is dropped again.
+
+Every app process schedules the job, but only the one holding the retention
+lease, a document in the primary database's ``job_leases`` collection, runs
+it. The lease is renewed before every batch and expires after
+``ARCHIVE_LEASE_SECONDS``, so another process takes over if the holder dies.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Items finished more than this many days ago are archived (0 disables the job)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+# Archived items are deleted by a TTL index after this many days (0 keeps them)
+ARCHIVE_TTL_DAYS = int(os.getenv("ARCHIVE_TTL_DAYS", 0))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+# Longer than any single batch takes
+ARCHIVE_LEASE_SECONDS = int(os.getenv("ARCHIVE_LEASE_SECONDS", 300))
+
+ARCHIVE_SUFFIX = "_archive"
+
+def archive_query(collection_name, cutoff):
+    """Return the filter selecting documents of a collection due for archival."""
+    cutoff_iso = cutoff.isoformat()
+    if collection_name == "reminders":
+        # Recurring reminders stay live until completed; one-off ones expire
+        return {
+            "datetime": {"$lt": cutoff_iso},
+            "$or": [{"completed": True}, {"recurrence": None}]
+        }
+    if collection_name == "todos":
+        # Todos completed via PUT before updated_at existed fall back to created_at
+        return {
+            "completed": True,
+            "$or": [
+                {"updated_at": {"$lt": cutoff_iso}},
+                {"updated_at": {"$exists": False}, "created_at": {"$lt": cutoff_iso}}
+            ]
+        }
+    raise ValueError(f"No retention rule for collection {collection_name!r}")
+
+# MongoDB error codes for an existing index with other options, a missing
+# collection and a missing index
+INDEX_OPTIONS_CONFLICT = 85
+NAMESPACE_NOT_FOUND = 26
+INDEX_NOT_FOUND = 27
+
+def _ensure_ttl_index(db, collection_name, ttl_days):
+    """Create, update or drop the archived_at TTL index to match ttl_days."""
+    from pymongo.errors import OperationFailure
+
+    archive = db[collection_name]
+    if not ttl_days:
+        try:
+            archive.drop_index("archived_at_1")
+        except OperationFailure as e:
+            if e.code not in (NAMESPACE_NOT_FOUND, INDEX_NOT_FOUND):
+                raise
+        return
+    seconds = ttl_days * 86400
+    try:
+        archive.create_index("archived_at", expireAfterSeconds=seconds)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        # ARCHIVE_TTL_DAYS changed since the index was created
+        db.command("collMod", collection_name, index={
+            "keyPattern": {"archived_at": 1},
+            "expireAfterSeconds": seconds
+        })
+
+def ensure_archive_indexes(db, ttl_days=ARCHIVE_TTL_DAYS):
+    """Create the indexes used by the archival scan and the archive reads."""
+    db.reminders.create_index([("datetime", 1)])
+    db.todos.create_index([("completed", 1), ("updated_at", 1)])
+    for name in ("reminders", "todos"):
+        db[name + ARCHIVE_SUFFIX].create_index([("user_id", 1)])
+        _ensure_ttl_index(db, name + ARCHIVE_SUFFIX, ttl_days)
+    db.reminders_archive.create_index([("user_id", 1), ("datetime", 1)])
+
+def archive_batch(db, collection_name, query, batch_size=ARCHIVE_BATCH_SIZE, on_archive=None):
+    """Move up to batch_size matching documents to the archive collection.
+
+    ``on_archive(collection_name, user_ids)`` is called after the move so
+    cached list results of those users can be dropped. Returns the number of
+    documents removed from the hot collection.
+    """
+    from pymongo.errors import BulkWriteError
+
+    hot = db[collection_name]
+    archive = db[collection_name + ARCHIVE_SUFFIX]
+    docs = list(hot.find(query).limit(batch_size))
+    if not docs:
+        return 0
+
+    ids = [doc["_id"] for doc in docs]
+    # Every write to a reminder or todo sets updated_at, so this identifies
+    # the version that was copied
+    versions = [{"_id": doc["_id"], "updated_at": doc.get("updated_at")} for doc in docs]
+    archived_at = datetime.utcnow()
+    for doc in docs:
+        doc["archived_at"] = archived_at
+    try:
+        archive.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys mean an earlier run archived these before crashing;
+        # replace those copies, the documents may have changed since
+        if any(err["code"] != 11000 for err in e.details["writeErrors"]):
+            raise
+        stale = {err["op"]["_id"] for err in e.details["writeErrors"]}
+        archive.delete_many({"_id": {"$in": list(stale)}})
+        archive.insert_many([doc for doc in docs if doc["_id"] in stale], ordered=False)
+
+    result = hot.delete_many({"$and": [query, {"$or": versions}]})
+    if result.deleted_count < len(docs):
+        # Changed between the read and the delete: keep them live only
+        still_live = [doc["_id"] for doc in hot.find({"_id": {"$in": ids}}, {"_id": 1})]
+        if still_live:
+            archive.delete_many({"_id": {"$in": still_live}})
+    if on_archive is not None:
+        on_archive(collection_name, {doc["user_id"] for doc in docs})
+    return result.deleted_count
+
+LEASE_ID = "retention"
+
+def acquire_lease(leases, owner, seconds=ARCHIVE_LEASE_SECONDS, now=None):
+    """Take or renew the retention lease for owner; return whether owner holds it.
+
+    The lease is free when no one holds it or its holder let it expire.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    now = now or datetime.utcnow()
+    expires_at = (now + timedelta(seconds=seconds)).isoformat()
+    try:
+        leases.insert_one({"_id": LEASE_ID, "owner": owner, "expires_at": expires_at})
+        return True
+    except DuplicateKeyError:
+        pass
+    held = leases.find_one_and_update(
+        {"_id": LEASE_ID, "$or": [{"owner": owner}, {"expires_at": {"$lt": now.isoformat()}}]},
+        {"$set": {"owner": owner, "expires_at": expires_at}}
+    )
+    return held is not None
+
+def run_retention(db, now=None, after_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                  on_archive=None, lease=None):
+    """Archive everything currently due, batch by batch.
+
+    ``lease()``, if given, is called before every batch to renew the
+    caller's lease; the run stops once it returns False. Returns a dict of
+    archived counts per collection.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=after_days)
+    counts = {}
+    for name in ("reminders", "todos"):
+        query = archive_query(name, cutoff)
+        counts[name] = 0
+        while True:
+            if lease is not None and not lease():
+                return counts
+            moved = archive_batch(db, name, query, batch_size, on_archive)
+            counts[name] += moved
+            if moved < batch_size:
+                break
+    return counts
+
+async def run_periodically(get_dbs, interval_seconds=ARCHIVE_INTERVAL_SECONDS, on_archive=None,
+                           get_leases=None):
+    """Run the retention job forever, off the event loop, every interval.
+
+    ``get_dbs()`` returns every database (shard) holding reminders and todos.
+    ``get_leases()`` returns the collection holding the lease; without it
+    this process runs the job unconditionally.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def hold_lease():
+        return get_leases is None or acquire_lease(get_leases(), owner)
+
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            if not await loop.run_in_executor(None, hold_lease):
+                continue
+        except Exception:
+            logger.exception("Could not take the retention lease")
+            continue
+        for db in get_dbs():
+            try:
+                counts = await loop.run_in_executor(
+                    None, lambda: run_retention(db, on_archive=on_archive, lease=hold_lease)
+                )
+                if any(counts.values()):
+                    logger.info("Archived %s", counts)
+            except Exception:
+                logger.exception("Retention job failed")
+
+def find_archived(db, collection_name, query):
+    """Return archived documents of a collection matching query (a user filter)."""
+    return list(db[collection_name + ARCHIVE_SUFFIX].find(query, {"_id": 0}))
@@ -1,3 +1,12 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,18 +14,60 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-import pymongo
-from pymongo import MongoClient
 import os
+import sys
 from dotenv import load_dotenv
 import uuid
-import requests
 
 load_dotenv()
 
-app = FastAPI(title="Daily Reminder App API", version="1.0.0")
+from ranking import rank_between
+import retention
+import audit
+from cache import ListCache, LocalInvalidationBus
+import sharding
+
+# Heavy dependencies (pymongo, passlib/bcrypt, jose) are imported on first use
+# so the app starts fast and does not need MongoDB to be reachable at import.
+STARTUP_TIMINGS = {"fastapi/pydantic": time.perf_counter() - _IMPORT_STARTED}
+
+def _record_timing(component, started):
+    STARTUP_TIMINGS[component] = time.perf_counter() - started
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Index creation needs MongoDB; run it off the startup path so the app
+    # still comes up while Mongo is unavailable, and keep retrying until it is.
+    index_task = asyncio.create_task(ensure_indexes_with_retry())
+    retention_task = None
+    if retention.ARCHIVE_AFTER_DAYS:
+        retention_task = asyncio.create_task(
+            retention.run_periodically(shard_router.all_dbs, on_archive=_invalidate_archived,
+                                       get_leases=lambda: get_db().job_leases)
+        )
+    audit_task = asyncio.create_task(audit_log.flush_periodically())
+    yield
+    index_task.cancel()
+    audit_task.cancel()
+    if retention_task is not None:
+        retention_task.cancel()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, audit_log.flush)
+    except Exception:
+        logger.exception("Final audit log flush failed; events remain in the spool")
+    _audit_flusher.shutdown(wait=False)
+    audit_log.close()
+    for name, db in shard_router.connected():
+        if name != sharding.DEFAULT_SHARD:
+            db.client.close()
+    if _mongo_client is not None:
+        _mongo_client.close()
+    if STORAGE_BACKEND == "sqlite" and _db is not None:
+        _db.close()
+
+app = FastAPI(title="Daily Reminder App API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -27,20 +78,217 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB connection
+# Storage: "mongo" (default) or "sqlite" for single-node installs, which
+# keeps everything in one local database file (SQLITE_PATH).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+if STORAGE_BACKEND not in ("mongo", "sqlite"):
+    raise ValueError(f"STORAGE_BACKEND must be mongo or sqlite, not {STORAGE_BACKEND!r}")
+
+# Database connection (created lazily by get_db)
 MONGO_URL = os.getenv("MONGO_URL")
-client = MongoClient(MONGO_URL)
-db = client.daily_reminder_app
+_mongo_client = None
+_db = None
+# Handlers run concurrently in the thread pool; lazy singletons are created
+# under a lock so only one client/engine is ever made
+_db_lock = threading.Lock()
+
+def get_db():
+    """Return the app database, connecting to the configured backend on first use."""
+    global _mongo_client, _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                started = time.perf_counter()
+                if STORAGE_BACKEND == "sqlite":
+                    from sqlite_store import SQLITE_PATH, SQLiteDatabase
+                    _db = SQLiteDatabase(SQLITE_PATH)
+                    _record_timing("sqlite", started)
+                else:
+                    from pymongo import MongoClient
+                    _mongo_client = MongoClient(MONGO_URL)
+                    _db = _mongo_client.daily_reminder_app
+                    _record_timing("pymongo", started)
+    return _db
+
+# Reminders and todos are split across shards by user; the primary database
+# (get_db) is the default shard and also holds users and the audit log.
+EXTRA_SHARDS = sharding.parse_shards(os.getenv("MONGO_SHARDS"))
+if EXTRA_SHARDS and STORAGE_BACKEND == "sqlite":
+    raise ValueError("MONGO_SHARDS is only supported with STORAGE_BACKEND=mongo")
+
+def _connect_shard(name):
+    if name == sharding.DEFAULT_SHARD:
+        return get_db()
+    from pymongo import MongoClient
+    return MongoClient(EXTRA_SHARDS[name]).daily_reminder_app
+
+shard_router = sharding.ShardRouter([sharding.DEFAULT_SHARD, *EXTRA_SHARDS], _connect_shard)
+
+def user_db(user):
+    """Return the shard database holding a user's reminders and todos.
+
+    Answers 503 while rebalance.py is moving the user to another shard.
+    """
+    if user.get("moving"):
+        raise HTTPException(
+            status_code=503,
+            detail="Your data is being moved, please retry shortly",
+            headers={"Retry-After": "10"}
+        )
+    return shard_router.db_for(user)
+
+INDEX_RETRY_MAX_SECONDS = int(os.getenv("INDEX_RETRY_MAX_SECONDS", 300))
+
+def _ensure_primary_indexes(db):
+    db.audit_log.create_index([("entity_id", 1), ("at", 1)])
+    db.users.create_index([("user_id", 1)])
+    db.users.create_index([("email", 1)])
+
+def _ensure_shard_indexes(db):
+    db.reminders.create_index([("user_id", 1), ("datetime", 1)])
+    db.reminders.create_index([("user_id", 1), ("priority", 1), ("datetime", 1)])
+    db.reminders.create_index([("user_id", 1), ("reminder_id", 1)])
+    _ensure_unique_todo_ranks(db)
+    db.todos.create_index([("user_id", 1), ("todo_id", 1)])
+    retention.ensure_archive_indexes(db)
+
+# MongoDB error codes for an index that exists with other options or keys
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+def _ensure_unique_todo_ranks(db):
+    """Create the unique (user_id, rank) index that keeps a user's todo order total.
+
+    Databases from before ranks were unique have a non-unique index, which is
+    replaced, and may hold tied or missing ranks, which are repaired first.
+    """
+    from pymongo.errors import OperationFailure
+
+    for _ in range(2):
+        try:
+            db.todos.create_index([("user_id", 1), ("rank", 1)], unique=True)
+            return
+        except OperationFailure as e:
+            if e.code in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+                db.todos.drop_index("user_id_1_rank_1")
+            elif e.code == 11000:
+                _repair_todo_ranks(db)
+            else:
+                raise
+    db.todos.create_index([("user_id", 1), ("rank", 1)], unique=True)
+
+def _repair_todo_ranks(db):
+    """Re-rank the todos of every user with tied or missing ranks, keeping their order."""
+    by_user = {}
+    for todo in db.todos.find({}, {"user_id": 1, "rank": 1, "created_at": 1}):
+        by_user.setdefault(todo["user_id"], []).append(todo)
+    for todos in by_user.values():
+        ranks = [todo.get("rank") for todo in todos]
+        if None not in ranks and len(set(ranks)) == len(ranks):
+            continue
+        # The list order: unranked first, then by rank, ties newest first
+        todos.sort(key=lambda todo: todo.get("created_at") or "", reverse=True)
+        todos.sort(key=lambda todo: (todo.get("rank") is not None, todo.get("rank") or ""))
+        rank = None
+        for todo in todos:
+            rank = rank_between(rank, None)
+            db.todos.update_one({"_id": todo["_id"]}, {"$set": {"rank": rank}})
+
+def ensure_indexes():
+    """Create the indexes the list and lookup queries rely on (idempotent).
+
+    Every shard is attempted even when another fails; raises RuntimeError
+    naming the databases that failed.
+    """
+    steps = [("primary", lambda: _ensure_primary_indexes(get_db()))]
+    steps += [(name, lambda name=name: _ensure_shard_indexes(shard_router.db(name)))
+              for name in shard_router.shard_names]
+    failed = []
+    for name, step in steps:
+        try:
+            step()
+        except Exception:
+            logger.exception("Could not create indexes on %s database", name)
+            failed.append(name)
+    if failed:
+        raise RuntimeError(f"Index creation failed for: {', '.join(failed)}")
+
+async def ensure_indexes_with_retry(max_delay=INDEX_RETRY_MAX_SECONDS):
+    """Run ensure_indexes in a worker thread until it succeeds, backing off."""
+    delay = min(1, max_delay)
+    while True:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, ensure_indexes)
+            return
+        except Exception as e:
+            logger.warning("%s; retrying in %ss", e, delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+# Change history for reminders and todos, flushed to db.audit_log in batches
+audit_log = audit.AuditLog(lambda: get_db().audit_log)
+
+# Per-user reminder/todo list results. Swap the bus for a shared pub/sub
+# channel when running several workers.
+list_cache = ListCache(bus=LocalInvalidationBus())
+
+# Handlers run in FastAPI's thread pool, so full audit buffers are flushed
+# from a dedicated worker rather than the event loop's executor
+_audit_flusher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-flush")
+
+def record_change(current_user, entity_type, entity_id, action, changes=None):
+    """Audit a successful reminder/todo write and drop the user's cached lists."""
+    list_cache.invalidate(current_user["user_id"], entity_type + "s")
+    if audit_log.record(current_user["user_id"], entity_type, entity_id, action, changes):
+        _audit_flusher.submit(audit_log.try_flush)
+
+def _invalidate_archived(collection_name, user_ids):
+    for user_id in user_ids:
+        list_cache.invalidate(user_id, collection_name)
+
+def get_history(current_user, entity_id):
+    """Return an entity's change events, including ones not yet flushed."""
+    events = list(get_db().audit_log.find(
+        {"entity_id": entity_id, "user_id": current_user["user_id"]}
+    ).sort("at", 1))
+    flushed = {e["_id"] for e in events}
+    events += [e for e in audit_log.pending(entity_id)
+               if e["user_id"] == current_user["user_id"] and e["_id"] not in flushed]
+    for event in events:
+        event["event_id"] = event.pop("_id")
+    return sorted(events, key=lambda e: e["at"])
 
 # JWT settings
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (passlib/bcrypt loaded lazily by get_pwd_context)
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
 security = HTTPBearer()
 
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                started = time.perf_counter()
+                from passlib.context import CryptContext
+                context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+                # passlib picks the bcrypt backend on first hash; load it here so
+                # the timing covers the whole initialization.
+                context.handler("bcrypt").get_backend()
+                _pwd_context = context
+                _record_timing("passlib/bcrypt", started)
+    return _pwd_context
+
+def get_jwt():
+    started = time.perf_counter()
+    from jose import jwt
+    STARTUP_TIMINGS.setdefault("jose", time.perf_counter() - started)
+    return jwt
+
 # Pydantic models
 class UserRegister(BaseModel):
     email: EmailStr
@@ -79,6 +327,14 @@ class TodoCreate(BaseModel):
     description: Optional[str] = ""
     completed: bool = False
 
+class TodoPatch(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+    # Move the todo next to a neighbour; only the moved todo is rewritten
+    after_id: Optional[str] = None
+    before_id: Optional[str] = None
+
 class HabitCreate(BaseModel):
     title: str
     description: Optional[str] = ""
@@ -97,10 +353,10 @@ class UserSettings(BaseModel):
 
 # Helper functions
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -109,43 +365,49 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = get_jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# Handlers (and this dependency) that touch the database are plain functions:
+# FastAPI runs them in its thread pool, keeping the blocking pymongo/SQLite
+# calls off the event loop.
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_jwt().decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.users.find_one({"email": email})
+    user = get_db().users.find_one({"email": email})
     if user is None:
         raise credentials_exception
     return user
 
 # Authentication endpoints
 @app.post("/api/auth/register")
-async def register(user: UserRegister):
+def register(user: UserRegister):
     # Check if user already exists
-    if db.users.find_one({"email": user.email}):
+    if get_db().users.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
     hashed_password = get_password_hash(user.password)
+    user_id = str(uuid.uuid4())
     user_doc = {
-        "user_id": str(uuid.uuid4()),
+        "user_id": user_id,
         "email": user.email,
         "full_name": user.full_name,
         "password_hash": hashed_password,
         "created_at": datetime.utcnow(),
+        "shard": shard_router.placement_for(user_id),
         "settings": {
             "modules": {
                 "todo": True,
@@ -156,7 +418,7 @@ async def register(user: UserRegister):
         }
     }
     
-    result = db.users.insert_one(user_doc)
+    result = get_db().users.insert_one(user_doc)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -175,8 +437,8 @@ async def register(user: UserRegister):
     }
 
 @app.post("/api/auth/login")
-async def login(user: UserLogin):
-    db_user = db.users.find_one({"email": user.email})
+def login(user: UserLogin):
+    db_user = get_db().users.find_one({"email": user.email})
     if not db_user or not verify_password(user.password, db_user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -200,8 +462,8 @@ async def login(user: UserLogin):
     }
 
 @app.post("/api/auth/forgot-password")
-async def forgot_password(request: ForgotPassword):
-    user = db.users.find_one({"email": request.email})
+def forgot_password(request: ForgotPassword):
+    user = get_db().users.find_one({"email": request.email})
     if not user:
         # Don't reveal if email exists or not
         return {"message": "If email exists, reset instructions have been sent"}
@@ -228,16 +490,123 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     }
 
 # Reminder endpoints
+REMINDER_STATUSES = ("upcoming", "overdue", "today")
+
+def _day_bounds(now):
+    """Return the ISO strings bounding the calendar day of an ISO timestamp."""
+    try:
+        day = datetime.fromisoformat(now[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="now must be an ISO date/time")
+    return day.isoformat()[:10], (day + timedelta(days=1)).isoformat()[:10]
+
+def _reminder_filter(user_id, status=None, priority=None, start=None, end=None, now=None):
+    """Build the Mongo filter for a reminder list query.
+
+    Reminder datetimes are ISO strings in the user's local time, so ranges are
+    plain string comparisons served by the (user_id, [priority,] datetime)
+    indexes. ``now`` is the client's local time and defaults to the server's.
+    """
+    query = {"user_id": user_id}
+    if priority:
+        query["priority"] = priority
+
+    bounds = {}
+    if start:
+        bounds["$gte"] = start
+    if end:
+        bounds["$lt"] = end
+    if status == "upcoming":
+        bounds["$gte"] = max(bounds.get("$gte", now), now)
+    elif status == "overdue":
+        bounds["$lt"] = min(bounds.get("$lt", now), now)
+        query["completed"] = {"$ne": True}
+    elif status == "today":
+        day_start, day_end = _day_bounds(now)
+        bounds["$gte"] = max(bounds.get("$gte", day_start), day_start)
+        bounds["$lt"] = min(bounds.get("$lt", day_end), day_end)
+    if bounds:
+        query["datetime"] = bounds
+    return query
+
 @app.get("/api/reminders")
-async def get_reminders(current_user: dict = Depends(get_current_user)):
-    reminders = list(db.reminders.find(
-        {"user_id": current_user["user_id"]},
-        {"_id": 0}
-    ).sort("datetime", 1))
+def get_reminders(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    now: Optional[str] = None,
+    include_archived: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if status is not None and status not in REMINDER_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(REMINDER_STATUSES)}")
+    query = _reminder_filter(
+        current_user["user_id"], status, priority, start, end,
+        now or datetime.now().isoformat()
+    )
+
+    # Status buckets depend on the current time, so only time-independent
+    # queries are cached
+    cacheable = status is None
+    params = (priority, start, end, include_archived)
+    if cacheable:
+        cached = list_cache.get(current_user["user_id"], "reminders", params)
+        if cached is not None:
+            return cached
+    generation = list_cache.generation
+
+    reminders = list(user_db(current_user).reminders.find(query, {"_id": 0}).sort("datetime", 1))
+    if include_archived:
+        reminders += retention.find_archived(user_db(current_user), "reminders", query)
+        reminders.sort(key=lambda r: r["datetime"])
+    if cacheable:
+        list_cache.put(current_user["user_id"], "reminders", params, reminders, generation)
     return reminders
 
+@app.get("/api/reminders/counts")
+def get_reminder_counts(
+    priority: Optional[str] = None,
+    now: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    now = now or datetime.now().isoformat()
+    day_start, day_end = _day_bounds(now)
+    match = {"user_id": current_user["user_id"]}
+    if priority:
+        match["priority"] = priority
+
+    def count_if(condition):
+        return {"$sum": {"$cond": [condition, 1, 0]}}
+
+    # One pass over the user's reminders, bucketed per priority
+    rows = user_db(current_user).reminders.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": "$priority",
+            "total": {"$sum": 1},
+            "upcoming": count_if({"$gte": ["$datetime", now]}),
+            "overdue": count_if({"$and": [
+                {"$lt": ["$datetime", now]},
+                {"$ne": ["$completed", True]}
+            ]}),
+            "today": count_if({"$and": [
+                {"$gte": ["$datetime", day_start]},
+                {"$lt": ["$datetime", day_end]}
+            ]})
+        }}
+    ])
+
+    counts = {"total": 0, "upcoming": 0, "overdue": 0, "today": 0, "by_priority": {}}
+    for row in rows:
+        row_priority = row.pop("_id")
+        counts["by_priority"][row_priority] = row
+        for bucket, value in row.items():
+            counts[bucket] += value
+    return counts
+
 @app.post("/api/reminders")
-async def create_reminder(reminder: ReminderCreate, current_user: dict = Depends(get_current_user)):
+def create_reminder(reminder: ReminderCreate, current_user: dict = Depends(get_current_user)):
     reminder_doc = {
         "reminder_id": str(uuid.uuid4()),
         "user_id": current_user["user_id"],
@@ -251,13 +620,14 @@ async def create_reminder(reminder: ReminderCreate, current_user: dict = Depends
         "completed": False
     }
     
-    result = db.reminders.insert_one(reminder_doc)
+    result = user_db(current_user).reminders.insert_one(reminder_doc)
     # Remove the MongoDB _id field for JSON serialization
     reminder_doc.pop('_id', None)
+    record_change(current_user, "reminder", reminder_doc["reminder_id"], "create", reminder_doc)
     return {"message": "Reminder created successfully", "reminder": reminder_doc}
 
 @app.put("/api/reminders/{reminder_id}")
-async def update_reminder(
+def update_reminder(
     reminder_id: str, 
     reminder: ReminderUpdate, 
     current_user: dict = Depends(get_current_user)
@@ -265,7 +635,7 @@ async def update_reminder(
     update_data = {k: v for k, v in reminder.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
-    result = db.reminders.update_one(
+    result = user_db(current_user).reminders.update_one(
         {"reminder_id": reminder_id, "user_id": current_user["user_id"]},
         {"$set": update_data}
     )
@@ -273,30 +643,133 @@ async def update_reminder(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Reminder not found")
     
+    record_change(current_user, "reminder", reminder_id, "update", update_data)
     return {"message": "Reminder updated successfully"}
 
 @app.delete("/api/reminders/{reminder_id}")
-async def delete_reminder(reminder_id: str, current_user: dict = Depends(get_current_user)):
-    result = db.reminders.delete_one(
+def delete_reminder(reminder_id: str, current_user: dict = Depends(get_current_user)):
+    result = user_db(current_user).reminders.delete_one(
         {"reminder_id": reminder_id, "user_id": current_user["user_id"]}
     )
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Reminder not found")
     
+    record_change(current_user, "reminder", reminder_id, "delete")
     return {"message": "Reminder deleted successfully"}
 
+@app.get("/api/reminders/{reminder_id}/history")
+def get_reminder_history(reminder_id: str, current_user: dict = Depends(get_current_user)):
+    return get_history(current_user, reminder_id)
+
 # Todo endpoints
 @app.get("/api/todos")
-async def get_todos(current_user: dict = Depends(get_current_user)):
-    todos = list(db.todos.find(
+def get_todos(include_archived: bool = False, current_user: dict = Depends(get_current_user)):
+    params = (include_archived,)
+    cached = list_cache.get(current_user["user_id"], "todos", params)
+    if cached is not None:
+        return cached
+    generation = list_cache.generation
+
+    todos = list(user_db(current_user).todos.find(
         {"user_id": current_user["user_id"]},
         {"_id": 0}
-    ).sort("created_at", -1))
+    ).sort([("rank", 1), ("created_at", -1)]))
+    if include_archived:
+        # Archived todos are listed after the live ones, newest first
+        archived = retention.find_archived(user_db(current_user), "todos", {"user_id": current_user["user_id"]})
+        todos += sorted(archived, key=lambda t: t["created_at"], reverse=True)
+    list_cache.put(current_user["user_id"], "todos", params, todos, generation)
     return todos
 
+def _ensure_todo_ranks(current_user):
+    """Give ranks to todos created before manual ordering existed.
+
+    Runs once per user: afterwards every todo has a rank and this is a single
+    indexed lookup that finds nothing.
+    """
+    user_id = current_user["user_id"]
+    unranked = list(user_db(current_user).todos.find(
+        {"user_id": user_id, "rank": {"$exists": False}},
+        {"_id": 0, "todo_id": 1}
+    ).sort("created_at", -1))
+    if not unranked:
+        return
+    first = user_db(current_user).todos.find_one(
+        {"user_id": user_id, "rank": {"$exists": True}},
+        {"_id": 0, "rank": 1},
+        sort=[("rank", 1)]
+    )
+    # Keep the old newest-first order and place it ahead of already ranked todos
+    upper = first["rank"] if first else None
+    for todo in reversed(unranked):
+        upper = rank_between(None, upper)
+        user_db(current_user).todos.update_one(
+            {"todo_id": todo["todo_id"], "user_id": user_id},
+            {"$set": {"rank": upper}}
+        )
+    list_cache.invalidate(user_id, "todos")
+
+def _rank_for_move(current_user, after_id, before_id):
+    """Return a rank placing a todo right after after_id, or else right before before_id.
+
+    The rank between the neighbour and the todo currently next to it is
+    looked up with one indexed query on (user_id, rank), so a todo moved into
+    the same gap meanwhile is accounted for on retry. Given both neighbours,
+    before_id is only checked to still sort after after_id.
+    """
+    user_id = current_user["user_id"]
+    def neighbour_rank(todo_id):
+        neighbour = user_db(current_user).todos.find_one(
+            {"todo_id": todo_id, "user_id": user_id},
+            {"_id": 0, "rank": 1}
+        )
+        if neighbour is None:
+            raise HTTPException(status_code=404, detail="Neighbour todo not found")
+        return neighbour["rank"]
+
+    lower = neighbour_rank(after_id) if after_id else None
+    upper = neighbour_rank(before_id) if before_id else None
+    if lower is not None and upper is not None and upper <= lower:
+        raise HTTPException(status_code=409, detail="Todo order changed, reload and try again")
+    if after_id:
+        following = user_db(current_user).todos.find_one(
+            {"user_id": user_id, "rank": {"$gt": lower}},
+            {"_id": 0, "rank": 1},
+            sort=[("rank", 1)]
+        )
+        upper = following["rank"] if following else None
+    elif before_id:
+        preceding = user_db(current_user).todos.find_one(
+            {"user_id": user_id, "rank": {"$lt": upper}},
+            {"_id": 0, "rank": 1},
+            sort=[("rank", -1)]
+        )
+        lower = preceding["rank"] if preceding else None
+
+    try:
+        return rank_between(lower, upper)
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Todo order changed, reload and try again")
+
+# Ranks are read and then written, so concurrent requests can pick the same
+# one; the unique (user_id, rank) index rejects all but one and the others
+# recompute their rank against the new neighbours
+RANK_WRITE_ATTEMPTS = 10
+
+def _write_with_unique_rank(write):
+    """Call write() until it stores a rank no other todo of the user holds."""
+    from pymongo.errors import DuplicateKeyError
+
+    for _ in range(RANK_WRITE_ATTEMPTS):
+        try:
+            return write()
+        except DuplicateKeyError:
+            continue
+    raise HTTPException(status_code=409, detail="Todo order changed, reload and try again")
+
 @app.post("/api/todos")
-async def create_todo(todo: TodoCreate, current_user: dict = Depends(get_current_user)):
+def create_todo(todo: TodoCreate, current_user: dict = Depends(get_current_user)):
     todo_doc = {
         "todo_id": str(uuid.uuid4()),
         "user_id": current_user["user_id"],
@@ -305,35 +778,108 @@ async def create_todo(todo: TodoCreate, current_user: dict = Depends(get_current
         "completed": todo.completed,
         "created_at": datetime.utcnow().isoformat()
     }
-    
-    result = db.todos.insert_one(todo_doc)
+
+    def insert():
+        _ensure_todo_ranks(current_user)
+        first = user_db(current_user).todos.find_one(
+            {"user_id": current_user["user_id"]},
+            {"_id": 0, "rank": 1},
+            sort=[("rank", 1)]
+        )
+        # New todos go to the top of the list
+        todo_doc["rank"] = rank_between(None, first["rank"] if first else None)
+        user_db(current_user).todos.insert_one(todo_doc)
+    _write_with_unique_rank(insert)
     # Remove the MongoDB _id field for JSON serialization
     todo_doc.pop('_id', None)
+    record_change(current_user, "todo", todo_doc["todo_id"], "create", todo_doc)
     return {"message": "Todo created successfully", "todo": todo_doc}
 
 @app.put("/api/todos/{todo_id}")
-async def update_todo(todo_id: str, todo: TodoCreate, current_user: dict = Depends(get_current_user)):
-    result = db.todos.update_one(
+def update_todo(todo_id: str, todo: TodoCreate, current_user: dict = Depends(get_current_user)):
+    update_data = {
+        "title": todo.title,
+        "description": todo.description,
+        "completed": todo.completed,
+        "updated_at": datetime.utcnow().isoformat()
+    }
+    result = user_db(current_user).todos.update_one(
         {"todo_id": todo_id, "user_id": current_user["user_id"]},
-        {"$set": {"title": todo.title, "description": todo.description, "completed": todo.completed}}
+        {"$set": update_data}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Todo not found")
     
+    record_change(current_user, "todo", todo_id, "update", update_data)
     return {"message": "Todo updated successfully"}
 
+@app.patch("/api/todos/{todo_id}")
+def patch_todo(todo_id: str, todo: TodoPatch, current_user: dict = Depends(get_current_user)):
+    update_data = {
+        k: v for k, v in todo.dict(exclude={"after_id", "before_id"}).items() if v is not None
+    }
+    move = bool(todo.after_id or todo.before_id)
+    if not update_data and not move:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    update_data["updated_at"] = datetime.utcnow().isoformat()
+
+    from pymongo import ReturnDocument
+    def update():
+        if move:
+            _ensure_todo_ranks(current_user)
+            update_data["rank"] = _rank_for_move(current_user, todo.after_id, todo.before_id)
+        return user_db(current_user).todos.find_one_and_update(
+            {"todo_id": todo_id, "user_id": current_user["user_id"]},
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    updated = _write_with_unique_rank(update)
+
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+
+    record_change(current_user, "todo", todo_id, "update", update_data)
+    return {"message": "Todo updated successfully", "todo": updated}
+
+@app.post("/api/todos/{todo_id}/toggle")
+def toggle_todo(todo_id: str, current_user: dict = Depends(get_current_user)):
+    # Flip completed server-side in one atomic update (aggregation pipeline
+    # update), so concurrent toggles never lose a write.
+    from pymongo import ReturnDocument
+    updated = user_db(current_user).todos.find_one_and_update(
+        {"todo_id": todo_id, "user_id": current_user["user_id"]},
+        [{"$set": {
+            "completed": {"$not": "$completed"},
+            "updated_at": datetime.utcnow().isoformat()
+        }}],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+
+    record_change(current_user, "todo", todo_id, "toggle", {"completed": updated["completed"]})
+    return {"message": "Todo updated successfully", "todo": updated}
+
 @app.delete("/api/todos/{todo_id}")
-async def delete_todo(todo_id: str, current_user: dict = Depends(get_current_user)):
-    result = db.todos.delete_one(
+def delete_todo(todo_id: str, current_user: dict = Depends(get_current_user)):
+    result = user_db(current_user).todos.delete_one(
         {"todo_id": todo_id, "user_id": current_user["user_id"]}
     )
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Todo not found")
     
+    record_change(current_user, "todo", todo_id, "delete")
     return {"message": "Todo deleted successfully"}
 
+@app.get("/api/todos/{todo_id}/history")
+def get_todo_history(todo_id: str, current_user: dict = Depends(get_current_user)):
+    return get_history(current_user, todo_id)
+
 # Weather endpoint
 @app.get("/api/weather")
 async def get_weather(lat: float, lon: float, current_user: dict = Depends(get_current_user)):
@@ -349,8 +895,21 @@ async def get_weather(lat: float, lon: float, current_user: dict = Depends(get_c
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {"status": "healthy", "timestamp": datetime.utcnow(), "list_cache": list_cache.stats()}
+
+def startup_report():
+    """Initialize every lazy component and print how long each one took."""
+    get_jwt()
+    get_pwd_context()
+    get_db()
+    print("Startup report (seconds)")
+    for component, seconds in STARTUP_TIMINGS.items():
+        print(f"  {component:<20} {seconds:.4f}")
+    print(f"  {'total':<20} {sum(STARTUP_TIMINGS.values()):.4f}")
 
 if __name__ == "__main__":
+    if "--startup-report" in sys.argv:
+        startup_report()
+        sys.exit(0)
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,101 @@
+"""Per-user sharding of reminders and todos across several MongoDB databases.
+
+The ``users`` collection (and the audit log) stay in the primary database.
+Each user's reminders, todos and their archives live together in one shard.
+New users are placed with a consistent hash ring over the configured shards,
+and the chosen shard is stored on the user document (``shard``). Routing a
+request is then free, because ``get_current_user`` already loads that
+document. Users without a ``shard`` field predate sharding and live in the
+default shard, which is the primary database.
+
+Adding a shard moves only the users whose ring position now falls on it;
+``rebalance.py`` moves their documents and updates their ``shard`` field.
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+
+DEFAULT_SHARD = "default"
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", 128))
+
+def parse_shards(spec):
+    """Parse ``name=mongodb-url;name=mongodb-url`` into an ordered dict of URLs.
+
+    Shards are separated by ``;`` because a replica-set URL lists its hosts
+    separated by commas.
+    """
+    shards = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(";"))):
+        name, sep, url = item.partition("=")
+        if not sep or not name or not url:
+            raise ValueError(f"Invalid shard spec {item!r}, expected name=mongodb-url")
+        if name == DEFAULT_SHARD or name in shards:
+            raise ValueError(f"Duplicate shard name {name!r}")
+        shards[name] = url
+    return shards
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class HashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, shard_names, vnodes=SHARD_VNODES):
+        if not shard_names:
+            raise ValueError("A hash ring needs at least one shard")
+        points = sorted(
+            (_hash(f"{name}#{i}"), name) for name in shard_names for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._names = [name for _, name in points]
+
+    def shard_for(self, key):
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._names[index]
+
+class ShardRouter:
+    """Maps users to shard databases, connecting to each shard on first use.
+
+    ``connect(name)`` returns the database object for a shard name.
+    """
+
+    def __init__(self, shard_names, connect, vnodes=SHARD_VNODES):
+        self.shard_names = list(shard_names)
+        self.ring = HashRing(self.shard_names, vnodes)
+        self._connect = connect
+        self._dbs = {}
+        self._lock = threading.Lock()
+
+    def placement_for(self, user_id):
+        """Return the shard the ring assigns to a user."""
+        return self.ring.shard_for(user_id)
+
+    def shard_of(self, user):
+        """Return the shard currently holding a user's documents."""
+        return user.get("shard") or DEFAULT_SHARD
+
+    def db(self, shard_name):
+        db = self._dbs.get(shard_name)
+        if db is None:
+            if shard_name not in self.shard_names:
+                raise KeyError(f"Unknown shard {shard_name!r}")
+            # Requests run in a thread pool; connect each shard only once
+            with self._lock:
+                db = self._dbs.get(shard_name)
+                if db is None:
+                    db = self._dbs[shard_name] = self._connect(shard_name)
+        return db
+
+    def db_for(self, user):
+        """Return the database holding a user's reminders and todos."""
+        return self.db(self.shard_of(user))
+
+    def all_dbs(self):
+        return [self.db(name) for name in self.shard_names]
+
+    def connected(self):
+        """Return (name, db) for the shards connected so far."""
+        with self._lock:
+            return list(self._dbs.items())
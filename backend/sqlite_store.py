@@ -0,0 +1,456 @@
+"""Embedded SQLite storage engine for single-node deployments.
+
+``SQLiteDatabase`` stands in for the pymongo database object returned by
+``get_db()`` when ``STORAGE_BACKEND=sqlite``. It implements the subset of the
+pymongo collection API that the app uses, so the request handlers do not
+change. Each collection is a table of JSON documents keyed by ``_id``.
+
+Filters and sorts are translated to SQL over ``json_extract(doc, '$.field')``,
+and ``create_index`` creates expression indexes on the same expressions, so
+the per-user list queries are index lookups as they are in MongoDB. Values
+are always bound as parameters, so every query shape has a fixed SQL text
+that sqlite3's per-connection statement cache keeps prepared.
+
+The database runs in WAL mode so readers never block the single writer.
+Connections are opened one per thread; FastAPI runs the (sync) handlers in its
+thread pool, which keeps SQLite work off the event loop.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from functools import lru_cache
+from datetime import date, datetime
+from types import SimpleNamespace
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "daily_reminder.db")
+
+_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+_COMPARISONS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _dumps(doc):
+    return json.dumps(doc, default=_json_default, separators=(",", ":"))
+
+@lru_cache(maxsize=256)
+def _field_sql(field):
+    if field == "_id":
+        return "_id"
+    if not _FIELD.match(field):
+        raise ValueError(f"Unsupported field name {field!r}")
+    return f"json_extract(doc, '$.{field}')"
+
+def _condition_sql(field, op, value, params):
+    column = _field_sql(field)
+    if op == "$ne":
+        if value is None:
+            return f"{column} IS NOT NULL"
+        params.append(value)
+        return f"({column} IS NULL OR {column} != ?)"
+    if op in _COMPARISONS:
+        params.append(value)
+        return f"{column} {_COMPARISONS[op]} ?"
+    if op == "$in":
+        values = [v for v in value if v is not None]
+        clauses = []
+        if values:
+            params.extend(values)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        if len(values) != len(value):
+            clauses.append(f"{column} IS NULL")
+        return "(" + " OR ".join(clauses) + ")" if clauses else "0"
+    if op == "$exists":
+        if field == "_id":
+            return "1" if value else "0"
+        return f"json_type(doc, '$.{field}') IS {'NOT ' if value else ''}NULL"
+    raise NotImplementedError(f"Query operator {op} is not supported by the SQLite backend")
+
+def _where_sql(query, params):
+    """Translate a MongoDB filter into a SQL condition, appending bound values."""
+    clauses = []
+    for key, condition in (query or {}).items():
+        if key in ("$or", "$and"):
+            joined = f" {key[1:].upper()} ".join(_where_sql(sub, params) for sub in condition)
+            clauses.append(f"({joined})")
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            clauses.extend(_condition_sql(key, op, value, params) for op, value in condition.items())
+        elif condition is None:
+            clauses.append(f"{_field_sql(key)} IS NULL")
+        else:
+            params.append(condition)
+            clauses.append(f"{_field_sql(key)} = ?")
+    return " AND ".join(clauses) or "1"
+
+def _sort_keys(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return list(key_or_list)
+
+def _order_sql(sort):
+    if not sort:
+        return ""
+    return " ORDER BY " + ", ".join(
+        f"{_field_sql(field)} {'DESC' if direction == -1 else 'ASC'}" for field, direction in sort
+    )
+
+def _project(doc, projection):
+    # Documents are freshly decoded, so exclusions are applied in place
+    if not projection:
+        return doc
+    if any(v for k, v in projection.items()):
+        result = {k: doc[k] for k, v in projection.items() if v and k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    for key in projection:
+        doc.pop(key, None)
+    return doc
+
+def _get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+def _order_value(value):
+    # MongoDB orders null/missing before any other value
+    return (value is not None, value)
+
+def _evaluate(expr, doc):
+    """Evaluate the aggregation expressions used by the app against a document."""
+    if isinstance(expr, str):
+        if expr == "$$ROOT":
+            return doc
+        if expr.startswith("$"):
+            return _get_path(doc, expr[1:])
+        return expr
+    if isinstance(expr, list):
+        return [_evaluate(e, doc) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+
+    (op, args), = expr.items()
+    if op == "$not":
+        arg = args[0] if isinstance(args, list) else args
+        return not _evaluate(arg, doc)
+    if op == "$and":
+        return all(_evaluate(a, doc) for a in args)
+    if op == "$or":
+        return any(_evaluate(a, doc) for a in args)
+    if op == "$cond":
+        condition, if_true, if_false = args
+        return _evaluate(if_true if _evaluate(condition, doc) else if_false, doc)
+    left, right = (_evaluate(a, doc) for a in args)
+    if op == "$eq":
+        return left == right
+    if op == "$ne":
+        return left != right
+    compare = {"$gt": "__gt__", "$gte": "__ge__", "$lt": "__lt__", "$lte": "__le__"}.get(op)
+    if compare is None:
+        raise NotImplementedError(f"Expression operator {op} is not supported by the SQLite backend")
+    return getattr(_order_value(left), compare)(_order_value(right))
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _evaluate(spec["_id"], doc)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"_id": key}
+            for field, accumulator in spec.items():
+                if field != "_id":
+                    group[field] = [] if "$push" in accumulator else 0
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            if op == "$sum":
+                group[field] += _evaluate(arg, doc)
+            elif op == "$push":
+                group[field].append(_evaluate(arg, doc))
+            else:
+                raise NotImplementedError(f"Accumulator {op} is not supported by the SQLite backend")
+    return list(groups.values())
+
+def _project_stage(doc, spec):
+    result = {}
+    for field, value in spec.items():
+        if value in (0, False):
+            continue
+        if value in (1, True):
+            if field in doc:
+                result[field] = doc[field]
+        else:
+            result[field] = _evaluate(value, doc)
+    if "_id" not in spec and "_id" in doc:
+        result["_id"] = doc["_id"]
+    return result
+
+def _apply_update(doc, update):
+    doc = dict(doc)
+    if isinstance(update, list):
+        # Aggregation pipeline update: each stage is {"$set": {field: expression}}
+        for stage in update:
+            for field, expr in stage["$set"].items():
+                doc[field] = _evaluate(expr, doc)
+        return doc
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(fields)
+        elif op == "$unset":
+            for field in fields:
+                doc.pop(field, None)
+        else:
+            raise NotImplementedError(f"Update operator {op} is not supported by the SQLite backend")
+    return doc
+
+class _Cursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = None
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _sort_keys(key_or_list, direction)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def __iter__(self):
+        rows = self._collection._select(self._query, self._sort, self._limit)
+        return (_project(doc, self._projection) for doc in rows)
+
+class SQLiteCollection:
+    def __init__(self, database, name):
+        if not _NAME.match(name):
+            raise ValueError(f"Unsupported collection name {name!r}")
+        self.database = database
+        self.name = name
+
+    def _conn(self):
+        return self.database.connection(self.name)
+
+    def _select(self, query, sort=None, limit=0, with_ids=False):
+        params = []
+        sql = f'SELECT _id, doc FROM "{self.name}" WHERE {_where_sql(query, params)}{_order_sql(sort)}'
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._conn().execute(sql, params).fetchall()
+        if with_ids:
+            return [(row[0], json.loads(row[1])) for row in rows]
+        return [json.loads(row[1]) for row in rows]
+
+    def find(self, filter=None, projection=None):
+        return _Cursor(self, filter, projection)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        rows = self._select(filter, sort and _sort_keys(sort), 1)
+        return _project(rows[0], projection) if rows else None
+
+    def count_documents(self, filter):
+        params = []
+        sql = f'SELECT COUNT(*) FROM "{self.name}" WHERE {_where_sql(filter, params)}'
+        return self._conn().execute(sql, params).fetchone()[0]
+
+    def insert_one(self, document):
+        from pymongo.errors import DuplicateKeyError
+
+        document.setdefault("_id", uuid.uuid4().hex)
+        try:
+            self._conn().execute(
+                f'INSERT INTO "{self.name}" (_id, doc) VALUES (?, ?)',
+                (document["_id"], _dumps(document))
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"Duplicate key in {self.name}: {e}", 11000)
+        return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    def insert_many(self, documents, ordered=True):
+        from pymongo.errors import BulkWriteError
+
+        errors = []
+        inserted = []
+        with self.database.transaction(self.name) as conn:
+            for index, document in enumerate(documents):
+                document.setdefault("_id", uuid.uuid4().hex)
+                try:
+                    conn.execute(
+                        f'INSERT INTO "{self.name}" (_id, doc) VALUES (?, ?)',
+                        (document["_id"], _dumps(document))
+                    )
+                    inserted.append(document["_id"])
+                except sqlite3.IntegrityError:
+                    errors.append({"index": index, "code": 11000, "op": document})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return SimpleNamespace(inserted_ids=inserted, acknowledged=True)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, return_document=False):
+        """Update the first match atomically; return_document=True returns it after."""
+        from pymongo.errors import DuplicateKeyError
+
+        with self.database.transaction(self.name) as conn:
+            rows = self._select(filter, sort and _sort_keys(sort), 1, with_ids=True)
+            if not rows:
+                return None
+            _id, before = rows[0]
+            after = _apply_update(before, update)
+            try:
+                conn.execute(f'UPDATE "{self.name}" SET doc = ? WHERE _id = ?', (_dumps(after), _id))
+            except sqlite3.IntegrityError as e:
+                raise DuplicateKeyError(f"Duplicate key in {self.name}: {e}", 11000)
+        return _project(after if return_document else before, projection)
+
+    def update_one(self, filter, update):
+        before = self.find_one_and_update(filter, update)
+        matched = 0 if before is None else 1
+        return SimpleNamespace(matched_count=matched, modified_count=matched, acknowledged=True)
+
+    def _delete(self, filter, limit):
+        params = []
+        sql = f'SELECT _id FROM "{self.name}" WHERE {_where_sql(filter, params)}'
+        if limit:
+            sql += " LIMIT 1"
+        cursor = self._conn().execute(f'DELETE FROM "{self.name}" WHERE _id IN ({sql})', params)
+        return SimpleNamespace(deleted_count=cursor.rowcount, acknowledged=True)
+
+    def delete_one(self, filter):
+        return self._delete(filter, 1)
+
+    def delete_many(self, filter):
+        return self._delete(filter, 0)
+
+    def aggregate(self, pipeline):
+        """Run the aggregation stages used by the app.
+
+        A leading $match runs in SQL (and can use indexes); $project,
+        $unionWith and $group run in Python on the matched documents.
+        """
+        stages = list(pipeline)
+        query = stages.pop(0)["$match"] if stages and "$match" in stages[0] else {}
+        docs = self._select(query)
+        for stage in stages:
+            (op, spec), = stage.items()
+            if op == "$project":
+                docs = [_project_stage(doc, spec) for doc in docs]
+            elif op == "$unionWith":
+                docs += list(self.database[spec["coll"]].aggregate(spec.get("pipeline", [])))
+            elif op == "$group":
+                docs = _group(docs, spec)
+            else:
+                raise NotImplementedError(f"Aggregation stage {op} is not supported by the SQLite backend")
+        return iter(docs)
+
+    def create_index(self, keys, unique=False, name=None, expireAfterSeconds=None, **kwargs):
+        """Create an expression index over the given fields.
+
+        Indexes get pymongo's default names. As in MongoDB, an existing index
+        of the same name but other uniqueness raises OperationFailure (code
+        85), and duplicates stopping a unique index raise DuplicateKeyError.
+        Documents without the fields are not unique-checked. TTL
+        (expireAfterSeconds) is not supported; such documents are kept.
+        """
+        from pymongo.errors import DuplicateKeyError, OperationFailure
+
+        keys = _sort_keys(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        columns = ", ".join(
+            f"{_field_sql(field)}{' DESC' if direction == -1 else ''}" for field, direction in keys
+        )
+        conn = self._conn()
+        existing = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (self._index_name(name),)
+        ).fetchone()
+        if existing is not None:
+            if existing[0].startswith("CREATE UNIQUE") != bool(unique):
+                raise OperationFailure(f"Index {name} already exists with different options", 85)
+            return name
+        try:
+            conn.execute(
+                f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{self._index_name(name)}" '
+                f'ON "{self.name}" ({columns})'
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"Cannot create unique index {name} on {self.name}: {e}", 11000)
+        return name
+
+    def drop_index(self, name):
+        self._conn().execute(f'DROP INDEX IF EXISTS "{self._index_name(name)}"')
+
+    def _index_name(self, name):
+        # SQLite index names are per database, so prefix the table
+        if not re.match(r"^[A-Za-z0-9_.-]+$", name):
+            raise ValueError(f"Unsupported index name {name!r}")
+        return f"{self.name}.{name}"
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        # Take the write lock up front so read-modify-write cannot interleave
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+class SQLiteDatabase:
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._tables = set()
+        self._lock = threading.Lock()
+
+    def connection(self, table=None):
+        """Return this thread's connection, creating the table if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False,
+                timeout=30, cached_statements=512
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        if table is not None and table not in self._tables:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (_id TEXT PRIMARY KEY, doc TEXT NOT NULL)')
+            with self._lock:
+                self._tables.add(table)
+        return conn
+
+    def transaction(self, table):
+        return _Transaction(self.connection(table))
+
+    def __getitem__(self, name):
+        return SQLiteCollection(self, name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return SQLiteCollection(self, name)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
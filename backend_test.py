@@ -19,6 +19,8 @@ class BackendTester:
         self.session = requests.Session()
         self.jwt_token = None
         self.user_data = None
+        self.todo_id = None
+        self.reminder_id = None
         self.test_results = []
         
     def log_test(self, test_name, success, message, details=None):
@@ -211,6 +213,7 @@ class BackendTester:
                 data = response.json()
                 if "message" in data and "reminder" in data:
                     reminder = data["reminder"]
+                    self.reminder_id = reminder["reminder_id"]
                     self.log_test("Create Reminder", True, f"Reminder created: '{reminder['title']}' (Priority: {reminder['priority']})")
                     return True
                 else:
@@ -242,6 +245,7 @@ class BackendTester:
                 data = response.json()
                 if "message" in data and "todo" in data:
                     todo = data["todo"]
+                    self.todo_id = todo["todo_id"]
                     self.log_test("Create Todo", True, f"Todo created: '{todo['title']}' (Completed: {todo['completed']})")
                     return True
                 else:
@@ -312,6 +316,143 @@ class BackendTester:
             self.log_test("Get Todos (With Data)", False, f"Get todos error: {str(e)}")
             return False
     
+    def test_get_reminders_filtered(self):
+        """Test GET /api/reminders status/priority filters and GET /api/reminders/counts"""
+        if not self.jwt_token:
+            self.log_test("Get Reminders (Filtered)", False, "No JWT token available")
+            return False
+            
+        try:
+            now = datetime.now().isoformat()
+            upcoming = self.session.get(f"{API_BASE}/reminders", params={"status": "upcoming", "priority": "High", "now": now})
+            overdue = self.session.get(f"{API_BASE}/reminders", params={"status": "overdue", "now": now})
+            counts = self.session.get(f"{API_BASE}/reminders/counts", params={"now": now})
+            
+            if upcoming.status_code != 200 or overdue.status_code != 200 or counts.status_code != 200:
+                self.log_test("Get Reminders (Filtered)", False, f"HTTP {upcoming.status_code}/{overdue.status_code}/{counts.status_code}")
+                return False
+            
+            data = counts.json()
+            # The reminder created for tomorrow is upcoming, High priority and not overdue
+            if len(upcoming.json()) == 1 and len(overdue.json()) == 0 and data["upcoming"] == 1 and data["by_priority"]["High"]["total"] == 1:
+                self.log_test("Get Reminders (Filtered)", True, f"Filters and counts match: {data['upcoming']} upcoming, {data['overdue']} overdue")
+                return True
+            else:
+                self.log_test("Get Reminders (Filtered)", False, "Unexpected filter results", data)
+                return False
+        except Exception as e:
+            self.log_test("Get Reminders (Filtered)", False, f"Filter reminders error: {str(e)}")
+            return False
+    
+    def test_get_reminders_include_archived(self):
+        """Test GET /api/reminders?include_archived=true returns live reminders too"""
+        if not self.jwt_token:
+            self.log_test("Get Reminders (Include Archived)", False, "No JWT token available")
+            return False
+            
+        try:
+            response = self.session.get(f"{API_BASE}/reminders", params={"include_archived": "true"})
+            todos_response = self.session.get(f"{API_BASE}/todos", params={"include_archived": "true"})
+            
+            if response.status_code == 200 and todos_response.status_code == 200:
+                data = response.json()
+                if isinstance(data, list) and len(data) > 0 and isinstance(todos_response.json(), list):
+                    self.log_test("Get Reminders (Include Archived)", True, f"Retrieved {len(data)} reminder(s) including archive")
+                    return True
+                else:
+                    self.log_test("Get Reminders (Include Archived)", False, "Live reminders missing from response", data)
+                    return False
+            else:
+                self.log_test("Get Reminders (Include Archived)", False, f"HTTP {response.status_code}/{todos_response.status_code}", response.text)
+                return False
+        except Exception as e:
+            self.log_test("Get Reminders (Include Archived)", False, f"Get reminders error: {str(e)}")
+            return False
+    
+    def test_reminder_history(self):
+        """Test GET /api/reminders/{reminder_id}/history endpoint"""
+        if not self.reminder_id:
+            self.log_test("Reminder History", False, "No reminder available")
+            return False
+            
+        try:
+            self.session.put(f"{API_BASE}/reminders/{self.reminder_id}", json={"priority": "Medium"})
+            self.session.put(f"{API_BASE}/reminders/{self.reminder_id}", json={"priority": "High"})
+            response = self.session.get(f"{API_BASE}/reminders/{self.reminder_id}/history")
+            
+            if response.status_code == 200:
+                actions = [event["action"] for event in response.json()]
+                if actions == ["create", "update", "update"]:
+                    self.log_test("Reminder History", True, f"History recorded: {', '.join(actions)}")
+                    return True
+                else:
+                    self.log_test("Reminder History", False, "Unexpected history", actions)
+                    return False
+            else:
+                self.log_test("Reminder History", False, f"HTTP {response.status_code}", response.text)
+                return False
+        except Exception as e:
+            self.log_test("Reminder History", False, f"Reminder history error: {str(e)}")
+            return False
+    
+    def test_toggle_todo(self):
+        """Test POST /api/todos/{todo_id}/toggle endpoint"""
+        if not self.todo_id:
+            self.log_test("Toggle Todo", False, "No todo available")
+            return False
+            
+        try:
+            response = self.session.post(f"{API_BASE}/todos/{self.todo_id}/toggle")
+            
+            if response.status_code == 200:
+                todo = response.json().get("todo", {})
+                if todo.get("completed") is True:
+                    self.log_test("Toggle Todo", True, f"Todo toggled to completed: '{todo['title']}'")
+                    return True
+                else:
+                    self.log_test("Toggle Todo", False, "Todo was not marked completed", todo)
+                    return False
+            else:
+                self.log_test("Toggle Todo", False, f"HTTP {response.status_code}", response.text)
+                return False
+        except Exception as e:
+            self.log_test("Toggle Todo", False, f"Toggle todo error: {str(e)}")
+            return False
+    
+    def test_patch_todo(self):
+        """Test PATCH /api/todos/{todo_id} partial update and reordering"""
+        if not self.todo_id:
+            self.log_test("Patch Todo", False, "No todo available")
+            return False
+            
+        try:
+            response = self.session.patch(f"{API_BASE}/todos/{self.todo_id}", json={"title": "Renamed task"})
+            if response.status_code != 200:
+                self.log_test("Patch Todo", False, f"HTTP {response.status_code}", response.text)
+                return False
+            todo = response.json()["todo"]
+            if todo["title"] != "Renamed task" or todo["completed"] is not True:
+                self.log_test("Patch Todo", False, "Partial update changed the wrong fields", todo)
+                return False
+            
+            # Create a second todo (it goes to the top) and move the first one above it
+            second = self.session.post(f"{API_BASE}/todos", json={"title": "Second task"}).json()["todo"]
+            response = self.session.patch(f"{API_BASE}/todos/{self.todo_id}", json={"before_id": second["todo_id"]})
+            if response.status_code != 200:
+                self.log_test("Patch Todo", False, f"Reorder HTTP {response.status_code}", response.text)
+                return False
+            
+            order = [t["todo_id"] for t in self.session.get(f"{API_BASE}/todos").json()]
+            if order.index(self.todo_id) < order.index(second["todo_id"]):
+                self.log_test("Patch Todo", True, "Partial update and reorder applied")
+                return True
+            else:
+                self.log_test("Patch Todo", False, "Todo was not moved before its neighbour", order)
+                return False
+        except Exception as e:
+            self.log_test("Patch Todo", False, f"Patch todo error: {str(e)}")
+            return False
+    
     def run_all_tests(self):
         """Run all backend API tests in sequence"""
         print("=" * 60)
@@ -331,7 +472,12 @@ class BackendTester:
             self.test_create_reminder,
             self.test_create_todo,
             self.test_get_reminders_with_data,
-            self.test_get_todos_with_data
+            self.test_get_todos_with_data,
+            self.test_get_reminders_filtered,
+            self.test_get_reminders_include_archived,
+            self.test_reminder_history,
+            self.test_toggle_todo,
+            self.test_patch_todo
         ]
         
         passed = 0
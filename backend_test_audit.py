@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Audit Log Tests - Write-behind buffering, batched flushes and spool recovery
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from audit import AuditLog
+
+class ListCollection:
+    """Local stand-in for a MongoDB collection that only supports insert_many"""
+    def __init__(self, fail=False):
+        self.docs = []
+        self.fail = fail
+
+    def insert_many(self, docs, ordered=True):
+        if self.fail:
+            raise ConnectionError("MongoDB unavailable")
+        self.docs.extend(dict(doc) for doc in docs)
+
+def make_log(collection, batch_size=3, **kwargs):
+    spool_path = os.path.join(tempfile.mkdtemp(), "audit_spool.jsonl")
+    return AuditLog(lambda: collection, spool_path=spool_path, batch_size=batch_size, **kwargs)
+
+def test_events_are_batched():
+    """Test that events only reach the collection on flush, in one batch"""
+    print("Testing batched audit flushes...")
+
+    collection = ListCollection()
+    log = make_log(collection)
+
+    assert log.record("user-1", "reminder", "r1", "create") is False
+    assert log.record("user-1", "reminder", "r1", "update", {"priority": "High"}) is False
+    assert log.record("user-1", "reminder", "r1", "delete") is True, "full buffer should ask for a flush"
+    assert collection.docs == [], "record must not write to the database"
+
+    assert log.flush() == 3
+    assert [doc["action"] for doc in collection.docs] == ["create", "update", "delete"]
+    assert os.path.getsize(log.spool_path) == 0, "spool should be empty after a flush"
+    print("✅ PASS: Events buffered and flushed in one batch")
+
+def test_spool_recovery_after_crash():
+    """Test that unflushed events are recovered from the spool by a new process"""
+    print("Testing audit spool recovery...")
+
+    collection = ListCollection()
+    crashed = make_log(collection, owner="worker-1")
+    crashed.record("user-1", "todo", "t1", "create")
+    crashed.record("user-1", "todo", "t1", "toggle", {"completed": True})
+    # The process dies: its spool lock is released, the spool stays
+    crashed.close()
+
+    # A new log with another owner stands in for the restarted process
+    restarted = AuditLog(lambda: collection, spool_path=crashed.base_spool_path, owner="worker-2")
+    restarted.record("user-1", "todo", "t1", "delete")
+
+    assert not os.path.exists(crashed.spool_path), "orphaned spool should be taken over"
+    assert restarted.flush() == 3
+    assert [doc["action"] for doc in collection.docs] == ["create", "toggle", "delete"]
+    print("✅ PASS: Spooled events recovered after restart")
+
+def test_failed_flush_keeps_events():
+    """Test that a failed flush keeps events buffered and spooled for a retry"""
+    print("Testing audit flush failure...")
+
+    collection = ListCollection(fail=True)
+    log = make_log(collection)
+    log.record("user-1", "reminder", "r1", "create")
+
+    try:
+        log.flush()
+        assert False, "flush should raise while the database is down"
+    except ConnectionError:
+        pass
+
+    assert len(log.pending("r1")) == 1
+    collection.fail = False
+    assert log.flush() == 1
+    assert collection.docs[0]["entity_id"] == "r1"
+    print("✅ PASS: Events kept and flushed on retry")
+
+def test_workers_keep_separate_spools():
+    """Test that one worker's flush does not touch another running worker's spool"""
+    print("Testing per-worker spools...")
+
+    collection = ListCollection()
+    first = make_log(collection, owner="worker-1")
+    second = AuditLog(lambda: collection, spool_path=first.base_spool_path, owner="worker-2")
+    first.record("user-1", "reminder", "r1", "create")
+    second.record("user-2", "reminder", "r2", "create")
+
+    assert first.spool_path != second.spool_path
+    assert first.flush() == 1
+    with open(second.spool_path) as f:
+        assert len(f.readlines()) == 1, "running worker's events must stay spooled"
+
+    same_owner = AuditLog(lambda: collection, spool_path=first.base_spool_path, owner="worker-1")
+    try:
+        same_owner.record("user-1", "reminder", "r1", "update")
+        assert False, "a spool locked by a running process must not be shared"
+    except RuntimeError:
+        pass
+    assert second.flush() == 1
+    print("✅ PASS: Workers spool and flush independently")
+
+def test_flush_requested_once_and_buffer_capped():
+    """Test that a down database gets one flush request and a bounded buffer"""
+    print("Testing flush requests and buffer cap...")
+
+    collection = ListCollection(fail=True)
+    log = make_log(collection, batch_size=2, max_buffered=10)
+
+    requests = [log.record("user-1", "todo", f"t{i}", "create") for i in range(5)]
+    assert requests == [False, True, False, False, False], requests
+    assert log.try_flush() == 0, "failures are logged, not raised"
+    requests = [log.record("user-1", "todo", f"t{i}", "create") for i in range(5, 20)]
+    assert not any(requests), "no new flush requests until a flush succeeds"
+
+    remaining = [e for i in range(20) for e in log.pending(f"t{i}")]
+    assert 0 < len(remaining) <= 10
+    assert remaining[-1]["entity_id"] == "t19", "the oldest events are dropped first"
+    with open(log.spool_path) as f:
+        assert len(f.readlines()) == len(remaining), "spool matches the capped buffer"
+
+    collection.fail = False
+    assert log.flush() == len(remaining)
+    assert log.record("user-1", "todo", "t20", "create") is False
+    assert log.record("user-1", "todo", "t21", "create") is True
+    print("✅ PASS: One flush request per cycle, buffer capped at max_buffered")
+
+def run_audit_tests():
+    """Run all audit log tests"""
+    print("=" * 60)
+    print("Daily Reminder App - Audit Log Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_events_are_batched,
+        test_spool_recovery_after_crash,
+        test_failed_flush_keeps_events,
+        test_workers_keep_separate_spools,
+        test_flush_requested_once_and_buffer_capped
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("AUDIT TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_audit_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+List Cache Tests - Byte-bounded LRU, precise invalidation and cross-worker bus
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from cache import ListCache, LocalInvalidationBus
+
+def todos(n, title="Buy groceries"):
+    return [{"todo_id": str(i), "title": title, "completed": False} for i in range(n)]
+
+def put(cache, user_id, kind, params, value):
+    cache.put(user_id, kind, params, value, cache.generation)
+
+def test_hits_and_misses():
+    """Test that cached results are returned and counted in the stats"""
+    print("Testing list cache hits and misses...")
+
+    cache = ListCache()
+    assert cache.get("user-1", "todos") is None
+    put(cache, "user-1", "todos", (), todos(2))
+    assert cache.get("user-1", "todos") == todos(2)
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    print("✅ PASS: Hits, misses and hit rate tracked")
+
+def test_evicts_least_recently_used_by_bytes():
+    """Test that the cache stays under its byte budget by evicting LRU entries"""
+    print("Testing byte-bounded LRU eviction...")
+
+    entry_size = len(json.dumps(todos(10)))
+    cache = ListCache(max_bytes=entry_size * 2)
+    put(cache, "user-1", "todos", (), todos(10))
+    put(cache, "user-2", "todos", (), todos(10))
+    cache.get("user-1", "todos")  # user-2 is now least recently used
+    put(cache, "user-3", "todos", (), todos(10))
+
+    assert cache.get("user-2", "todos") is None
+    assert cache.get("user-1", "todos") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+    # A result bigger than the whole cache is never stored
+    put(cache, "user-4", "todos", (), todos(100))
+    assert cache.get("user-4", "todos") is None
+    print("✅ PASS: LRU entries evicted to stay within the byte budget")
+
+def test_invalidation_is_per_user_and_kind():
+    """Test that invalidating one user's todos leaves other entries cached"""
+    print("Testing precise invalidation...")
+
+    cache = ListCache()
+    put(cache, "user-1", "todos", (False,), todos(1))
+    put(cache, "user-1", "todos", (True,), todos(2))
+    put(cache, "user-1", "reminders", (), [])
+    put(cache, "user-2", "todos", (False,), todos(3))
+
+    cache.invalidate("user-1", "todos")
+
+    assert cache.get("user-1", "todos", (False,)) is None
+    assert cache.get("user-1", "todos", (True,)) is None
+    assert cache.get("user-1", "reminders") == []
+    assert cache.get("user-2", "todos", (False,)) == todos(3)
+    print("✅ PASS: Only the written user's lists of that kind dropped")
+
+def test_stale_result_not_stored():
+    """Test that a result read before an invalidation is not cached"""
+    print("Testing stale result rejection...")
+
+    cache = ListCache()
+    generation = cache.generation  # handler starts its database read
+    cache.invalidate("user-1", "todos")  # a write lands meanwhile
+    cache.put("user-1", "todos", (), todos(1), generation)
+
+    assert cache.get("user-1", "todos") is None
+    print("✅ PASS: Result read across a write was not stored")
+
+def test_other_users_writes_do_not_reject_put():
+    """Test that writes by other users or to other kinds keep a read cacheable"""
+    print("Testing per-user staleness...")
+
+    cache = ListCache()
+    generation = cache.generation
+    for i in range(50):
+        cache.invalidate(f"other-{i}", "todos")
+    cache.invalidate("user-1", "reminders")
+    cache.put("user-1", "todos", (), todos(2), generation)
+
+    assert cache.get("user-1", "todos") == todos(2)
+    print("✅ PASS: Unrelated writes did not reject the result")
+
+def test_forgotten_invalidations_stay_safe():
+    """Test that results are rejected once the invalidation history overflows"""
+    print("Testing invalidation history limit...")
+
+    import cache as cache_module
+    limit = cache_module.INVALIDATION_HISTORY
+    cache_module.INVALIDATION_HISTORY = 3
+    try:
+        cache = ListCache()
+        generation = cache.generation
+        cache.invalidate("user-1", "todos")
+        for i in range(3):
+            cache.invalidate(f"other-{i}", "todos")
+        cache.put("user-1", "todos", (), todos(1), generation)
+        assert cache.get("user-1", "todos") is None, "forgotten invalidation must still reject"
+
+        cache.put("user-1", "todos", (), todos(1), cache.generation)
+        assert cache.get("user-1", "todos") == todos(1)
+    finally:
+        cache_module.INVALIDATION_HISTORY = limit
+    print("✅ PASS: Overflowed history rejects conservatively")
+
+def test_cross_worker_invalidation():
+    """Test that an invalidation in one worker reaches the other worker's cache"""
+    print("Testing cross-worker invalidation...")
+
+    bus = LocalInvalidationBus()
+    worker_a = ListCache(bus=bus)
+    worker_b = ListCache(bus=bus)
+    put(worker_a, "user-1", "todos", (), todos(1))
+    put(worker_b, "user-1", "todos", (), todos(1))
+
+    worker_a.invalidate("user-1", "todos")
+
+    assert worker_a.get("user-1", "todos") is None
+    assert worker_b.get("user-1", "todos") is None
+    print("✅ PASS: Invalidation delivered to the other worker")
+
+def run_cache_tests():
+    """Run all list cache tests"""
+    print("=" * 60)
+    print("Daily Reminder App - List Cache Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_hits_and_misses,
+        test_evicts_least_recently_used_by_bytes,
+        test_invalidation_is_per_user_and_kind,
+        test_stale_result_not_stored,
+        test_other_users_writes_do_not_reject_put,
+        test_forgotten_invalidations_stay_safe,
+        test_cross_worker_invalidation
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("CACHE TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_cache_tests()
+    sys.exit(0 if success else 1)
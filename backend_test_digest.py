@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Daily Digest Tests - Recurrence expansion, rendering and checkpoints
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from digest import JsonlFileSink, load_checkpoint, occurs_on, render_digest, run_digest, save_checkpoint
+from sharding import ShardRouter
+from sqlite_store import SQLiteDatabase
+
+MONDAY = date(2026, 10, 19)
+
+def reminder(dt, recurrence=None, recurrence_days=None):
+    return {"title": "Standup", "datetime": dt, "recurrence": recurrence, "recurrence_days": recurrence_days}
+
+def test_recurrence_expansion():
+    """Test which reminders occur on a given day and at what time"""
+    print("Testing recurrence expansion...")
+
+    assert occurs_on(reminder("2026-10-19T09:30"), MONDAY) == "2026-10-19T09:30:00"
+    assert occurs_on(reminder("2026-10-18T09:30"), MONDAY) is None
+    assert occurs_on(reminder("2026-01-01T08:00", "daily"), MONDAY) == "2026-10-19T08:00:00"
+    assert occurs_on(reminder("2026-10-20T08:00", "daily"), MONDAY) is None, "starts tomorrow"
+    assert occurs_on(reminder("2026-10-12T10:00", "weekly"), MONDAY) is not None
+    assert occurs_on(reminder("2026-10-13T10:00", "weekly"), MONDAY) is None
+    assert occurs_on(reminder("2026-09-19T10:00", "monthly"), MONDAY) is not None
+    assert occurs_on(reminder("2026-01-01T10:00", "custom", ["Monday", "Wed"]), MONDAY) is not None
+    assert occurs_on(reminder("2026-01-01T10:00", "custom", ["tuesday"]), MONDAY) is None
+    assert occurs_on(reminder("not a date"), MONDAY) is None
+    print("✅ PASS: One-off and recurring reminders expanded correctly")
+
+def test_render_digest():
+    """Test that a digest lists today's reminders in time order and open todos"""
+    print("Testing digest rendering...")
+
+    digest = render_digest({
+        "user_id": "u1",
+        "email": "sarah@example.com",
+        "full_name": "Sarah Johnson",
+        "date": MONDAY.isoformat(),
+        "items": [
+            dict(reminder("2026-10-19T14:00"), kind="reminder", priority="High", title="Dentist"),
+            dict(reminder("2026-01-05T09:00", "weekly"), kind="reminder", priority="Low"),
+            dict(reminder("2026-10-21T09:00"), kind="reminder", title="Not today"),
+            {"kind": "todo", "title": "Buy milk", "rank": "r"},
+            {"kind": "todo", "title": "Call mom", "rank": "i"}
+        ]
+    })
+
+    assert digest["reminders"] == 2 and digest["todos"] == 2
+    text = digest["text"]
+    assert text.startswith("Good morning Sarah Johnson!")
+    assert text.index("09:00  Standup [Low]") < text.index("14:00  Dentist [High]")
+    assert text.index("Call mom") < text.index("Buy milk"), "todos keep their manual order"
+    assert "Not today" not in text
+    print("✅ PASS: Digest rendered with reminders and open tasks")
+
+def test_checkpoint_resume():
+    """Test that checkpoints resume the same date and are ignored for another"""
+    print("Testing digest checkpoints...")
+
+    path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+    assert load_checkpoint(path, MONDAY) is None
+
+    save_checkpoint(path, MONDAY, "user-0500")
+    assert load_checkpoint(path, MONDAY) == "user-0500"
+    assert load_checkpoint(path, date(2026, 10, 20)) is None
+    print("✅ PASS: Checkpoint resumes only the run for its date")
+
+def test_jsonl_sink():
+    """Test that the file sink writes one JSON line per digest"""
+    print("Testing JSONL digest sink...")
+
+    path = os.path.join(tempfile.mkdtemp(), "digests.jsonl")
+    sink = JsonlFileSink(path)
+    sink.write([{"user_id": "u1", "text": "a"}, {"user_id": "u2", "text": "b"}])
+    sink.close()
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["user_id"] for line in lines] == ["u1", "u2"]
+    print("✅ PASS: Digests written as JSON lines")
+
+class ListSink:
+    def __init__(self):
+        self.digests = []
+
+    def write(self, digests):
+        self.digests.extend(digests)
+
+    def close(self):
+        pass
+
+def make_sharded_app():
+    """Users on the primary database and two SQLite shards, like server.py sets up"""
+    directory = tempfile.mkdtemp()
+    dbs = {name: SQLiteDatabase(os.path.join(directory, f"{name}.db")) for name in ("default", "s1")}
+    router = ShardRouter(["default", "s1"], dbs.__getitem__)
+    users = dbs["default"].users
+    for i in range(5):
+        user_id = f"user-{i}"
+        shard = "s1" if i % 2 else "default"
+        users.insert_one({"user_id": user_id, "email": f"{user_id}@example.com",
+                          "full_name": f"User {i}", "shard": shard})
+        db = dbs[shard]
+        db.reminders.insert_many([
+            {"user_id": user_id, "title": "Standup", "datetime": "2026-10-12T09:00",
+             "recurrence": "weekly", "priority": "High", "completed": False},
+            {"user_id": user_id, "title": "Dentist", "datetime": "2026-10-19T14:00",
+             "recurrence": None, "priority": "Low", "completed": False},
+            {"user_id": user_id, "title": "Done already", "datetime": "2026-10-19T08:00",
+             "recurrence": None, "priority": "Low", "completed": True},
+            {"user_id": user_id, "title": "Retired habit", "datetime": "2026-01-01T07:00",
+             "recurrence": "daily", "priority": "Low", "completed": True},
+            {"user_id": user_id, "title": "Tomorrow", "datetime": "2026-10-20T09:00",
+             "recurrence": None, "priority": "Low", "completed": False}
+        ])
+        db.todos.insert_many([
+            {"user_id": user_id, "title": f"Task of user {i}", "rank": "a0", "completed": False},
+            {"user_id": user_id, "title": "Finished task", "rank": "a1", "completed": True}
+        ])
+    return users, router
+
+def test_run_digest_end_to_end():
+    """Test chunked digests across shards, skipping completed items, and resuming"""
+    print("Testing end-to-end digest run...")
+
+    users, router = make_sharded_app()
+    checkpoint = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+    sink = ListSink()
+    done = run_digest(users, router, sink, MONDAY, chunk_size=2, workers=1,
+                      checkpoint_path=checkpoint, log=lambda message: None)
+
+    assert done == 5
+    assert [d["user_id"] for d in sink.digests] == [f"user-{i}" for i in range(5)]
+    for i, digest in enumerate(sink.digests):
+        assert digest["reminders"] == 2 and digest["todos"] == 1, digest
+        assert f"Task of user {i}" in digest["text"]
+        for hidden in ("Done already", "Retired habit", "Finished task", "Tomorrow"):
+            assert hidden not in digest["text"], f"{hidden} listed for user-{i}"
+    assert load_checkpoint(checkpoint, MONDAY) == "user-4"
+
+    save_checkpoint(checkpoint, MONDAY, "user-2")
+    resumed = ListSink()
+    assert run_digest(users, router, resumed, MONDAY, chunk_size=2, workers=1,
+                      checkpoint_path=checkpoint, log=lambda message: None) == 2
+    assert [d["user_id"] for d in resumed.digests] == ["user-3", "user-4"]
+    print("✅ PASS: 5 users on 2 shards digested in chunks, resumed after user-2")
+
+def run_digest_tests():
+    """Run all digest tests"""
+    print("=" * 60)
+    print("Daily Reminder App - Daily Digest Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_recurrence_expansion,
+        test_render_digest,
+        test_checkpoint_resume,
+        test_jsonl_sink,
+        test_run_digest_end_to_end
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("DIGEST TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_digest_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Ranking Tests - Todo ordering keys for prepend, append and moves
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from ranking import INTEGER_ZERO, rank_between
+
+def run_in_backend(code):
+    # A fresh server process on its own SQLite database
+    tmp = tempfile.mkdtemp()
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env=dict(os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=os.path.join(tmp, "ranking.db"),
+                 AUDIT_SPOOL_PATH=os.path.join(tmp, "audit_spool.jsonl")),
+    )
+
+def test_prepend_and_append_stay_short():
+    """Test that adding at either end keeps ranks logarithmically short"""
+    print("Testing prepend/append key length...")
+
+    assert rank_between() == INTEGER_ZERO
+
+    first = None
+    for _ in range(1000):
+        rank = rank_between(None, first)
+        assert first is None or rank < first
+        first = rank
+    assert len(first) <= 3, f"1000 prepends gave {first!r}"
+
+    last = None
+    for _ in range(5000):
+        rank = rank_between(last, None)
+        assert last is None or rank > last
+        last = rank
+    assert len(last) <= 4, f"5000 appends gave {last!r}"
+    print(f"✅ PASS: 1000 prepends -> {first!r}, 5000 appends -> {last!r}")
+
+def test_random_inserts_keep_order():
+    """Test that ranks inserted at random positions always sort between neighbours"""
+    print("Testing random inserts...")
+
+    rng = random.Random(42)
+    ranks = [rank_between()]
+    for _ in range(3000):
+        i = rng.randint(0, len(ranks))
+        lower = ranks[i - 1] if i > 0 else None
+        upper = ranks[i] if i < len(ranks) else None
+        rank = rank_between(lower, upper)
+        assert (lower is None or lower < rank) and (upper is None or rank < upper), (lower, rank, upper)
+        ranks.insert(i, rank)
+
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == len(ranks)
+    print(f"✅ PASS: 3000 inserts ordered, longest rank {max(map(len, ranks))} characters")
+
+def test_between_adjacent_ranks():
+    """Test inserting between neighbours that differ in the last digit"""
+    print("Testing inserts between adjacent ranks...")
+
+    assert "a0" < rank_between("a0", "a1") < "a1"
+    assert "a0" < rank_between("a0", "a0V") < "a0V"
+    assert "Zz" < rank_between("Zz", "a0") < "a0"
+    assert "az" < rank_between("az", "b00") < "b00"
+    print("✅ PASS: Ranks found between adjacent neighbours")
+
+def test_invalid_bounds():
+    """Test that out-of-order or malformed bounds are rejected"""
+    print("Testing invalid bounds...")
+
+    for lower, upper in (("a1", "a0"), ("a0", "a0"), ("a00", None), ("b0", None), (None, "a0!")):
+        try:
+            rank_between(lower, upper)
+            assert False, f"{lower!r}, {upper!r} should be rejected"
+        except ValueError:
+            pass
+    print("✅ PASS: Invalid bounds rejected")
+
+CONCURRENT_TODOS_SCRIPT = """
+import threading, server
+server.ensure_indexes()
+user = {"user_id": "u1"}
+def run_together(calls):
+    start = threading.Barrier(len(calls))
+    def run(call):
+        start.wait()
+        call()
+    threads = [threading.Thread(target=run, args=(call,)) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+run_together([lambda i=i: server.create_todo(server.TodoCreate(title=f"t{i}"), user) for i in range(8)])
+todos = server.get_todos(False, user)
+print(len(todos), len({t["rank"] for t in todos}))
+first, second = todos[0]["todo_id"], todos[1]["todo_id"]
+movers = [t["todo_id"] for t in todos[2:]]
+run_together([
+    lambda todo_id=todo_id: server.patch_todo(
+        todo_id, server.TodoPatch(after_id=first, before_id=second), user)
+    for todo_id in movers
+])
+order = [t["todo_id"] for t in server.get_todos(False, user)]
+print(order[0] == first, sorted(order[1:7]) == sorted(movers), order[7] == second)
+"""
+
+def test_concurrent_creates_and_moves_get_unique_ranks():
+    """Test that concurrent creates and moves into one gap never tie ranks"""
+    print("Testing concurrent todo creates and moves...")
+
+    result = run_in_backend(CONCURRENT_TODOS_SCRIPT)
+
+    assert result.returncode == 0, result.stderr
+    created, moved = result.stdout.split("\n")[:2]
+    assert created == "8 8", f"todos, distinct ranks: {created}"
+    assert moved == "True True True", moved
+    print("✅ PASS: 8 concurrent creates and 6 concurrent moves kept distinct ranks")
+
+REPAIR_SCRIPT = """
+import server
+db = server.get_db()
+# A database from before ranks were unique: tied and missing ranks
+db.todos.create_index([("user_id", 1), ("rank", 1)])
+db.todos.insert_many([
+    {"todo_id": "tied-old", "user_id": "u1", "rank": "a0", "created_at": "2026-10-01"},
+    {"todo_id": "tied-new", "user_id": "u1", "rank": "a0", "created_at": "2026-10-02"},
+    {"todo_id": "last", "user_id": "u1", "rank": "a1", "created_at": "2026-10-03"},
+    {"todo_id": "legacy-old", "user_id": "u1", "created_at": "2026-09-01"},
+    {"todo_id": "legacy-new", "user_id": "u1", "created_at": "2026-09-02"},
+    {"todo_id": "other", "user_id": "u2", "rank": "a0", "created_at": "2026-10-01"}
+])
+server.ensure_indexes()
+user = {"user_id": "u1"}
+print(",".join(t["todo_id"] for t in server.get_todos(False, user)))
+print(db.todos.find_one({"todo_id": "other"})["rank"])
+server.create_todo(server.TodoCreate(title="new"), user)
+try:
+    db.todos.insert_one({"user_id": "u1", "rank": "a0"})
+    print("tie accepted")
+except Exception as e:
+    print(type(e).__name__)
+"""
+
+def test_existing_ties_repaired_for_unique_index():
+    """Test that ensure_indexes re-ranks tied and unranked todos, keeping their order"""
+    print("Testing repair of tied ranks...")
+
+    result = run_in_backend(REPAIR_SCRIPT)
+
+    assert result.returncode == 0, result.stderr
+    order, other, tie = result.stdout.split("\n")[:3]
+    assert order == "legacy-new,legacy-old,tied-new,tied-old,last", order
+    assert other == "a0", "users without ties keep their ranks"
+    assert tie == "DuplicateKeyError", tie
+    print("✅ PASS: Ties repaired in list order, unique index enforced")
+
+def run_ranking_tests():
+    """Run all ranking tests"""
+    print("=" * 60)
+    print("Daily Reminder App - Ranking Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_prepend_and_append_stay_short,
+        test_random_inserts_keep_order,
+        test_between_adjacent_ranks,
+        test_invalid_bounds,
+        test_concurrent_creates_and_moves_get_unique_ranks,
+        test_existing_ties_repaired_for_unique_index
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("RANKING TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_ranking_tests()
+    sys.exit(0 if success else 1)
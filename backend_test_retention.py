@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Retention Tests - Archive selection, batching, crash re-runs and concurrent edits
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from pymongo.errors import OperationFailure
+
+from retention import acquire_lease, archive_batch, archive_query, ensure_archive_indexes, run_retention
+from sqlite_store import SQLiteDatabase
+
+NOW = datetime(2026, 10, 19, 12, 0)
+OLD = "2026-08-01T09:00:00"
+RECENT = "2026-10-18T09:00:00"
+
+def make_db():
+    return SQLiteDatabase(os.path.join(tempfile.mkdtemp(), "retention.db"))
+
+def seed(db):
+    db.reminders.insert_many([
+        {"_id": "expired", "user_id": "u1", "datetime": OLD, "recurrence": None, "completed": False},
+        {"_id": "done-recurring", "user_id": "u1", "datetime": OLD, "recurrence": "daily", "completed": True},
+        {"_id": "live-recurring", "user_id": "u1", "datetime": OLD, "recurrence": "daily", "completed": False},
+        {"_id": "upcoming", "user_id": "u2", "datetime": RECENT, "recurrence": None, "completed": False}
+    ])
+    db.todos.insert_many([
+        {"_id": "done-old", "user_id": "u1", "completed": True, "created_at": OLD, "updated_at": OLD},
+        {"_id": "done-legacy", "user_id": "u2", "completed": True, "created_at": OLD},
+        {"_id": "done-recent", "user_id": "u1", "completed": True, "created_at": OLD, "updated_at": RECENT},
+        {"_id": "open-old", "user_id": "u1", "completed": False, "created_at": OLD}
+    ])
+
+def ids(collection):
+    return sorted(doc["_id"] for doc in collection.find({}))
+
+def test_archive_query_selection():
+    """Test which reminders and todos are due for archival"""
+    print("Testing archive selection...")
+
+    db = make_db()
+    seed(db)
+    counts = run_retention(db, now=NOW, after_days=30)
+
+    assert counts == {"reminders": 2, "todos": 2}, counts
+    assert ids(db.reminders) == ["live-recurring", "upcoming"]
+    assert ids(db.reminders_archive) == ["done-recurring", "expired"]
+    assert ids(db.todos) == ["done-recent", "open-old"]
+    assert ids(db.todos_archive) == ["done-legacy", "done-old"]
+    assert all("archived_at" in doc for doc in db.todos_archive.find({}))
+    print("✅ PASS: Expired and completed items archived, live ones kept")
+
+def test_batches_and_on_archive():
+    """Test that everything due is moved in batches and each batch is reported"""
+    print("Testing batching...")
+
+    db = make_db()
+    db.todos.insert_many([
+        {"_id": f"t{i}", "user_id": f"u{i % 2}", "completed": True, "created_at": OLD, "updated_at": OLD}
+        for i in range(5)
+    ])
+    calls = []
+    counts = run_retention(db, now=NOW, after_days=30, batch_size=2,
+                           on_archive=lambda name, user_ids: calls.append((name, user_ids)))
+
+    assert counts["todos"] == 5
+    assert db.todos.count_documents({}) == 0 and db.todos_archive.count_documents({}) == 5
+    assert len(calls) == 3, calls
+    assert set().union(*(user_ids for _, user_ids in calls)) == {"u0", "u1"}
+    print("✅ PASS: 5 todos archived in 3 batches")
+
+def test_rerun_after_crash():
+    """Test that a batch copied before a crash is archived once, with current data"""
+    print("Testing re-run after a crash...")
+
+    db = make_db()
+    seed(db)
+    # An earlier run copied this todo and crashed before the hot delete
+    db.todos_archive.insert_one({"_id": "done-old", "user_id": "u1", "title": "stale"})
+    db.todos.update_one({"_id": "done-old"}, {"$set": {"title": "current"}})
+
+    run_retention(db, now=NOW, after_days=30)
+
+    assert ids(db.todos_archive) == ["done-legacy", "done-old"]
+    assert db.todos_archive.find_one({"_id": "done-old"})["title"] == "current"
+    assert db.todos.find_one({"_id": "done-old"}) is None
+    print("✅ PASS: Crashed batch completed without duplicates or stale copies")
+
+class ChangeAfterFind:
+    """Database wrapper that applies a write between the batch read and delete"""
+    def __init__(self, db, collection_name, change):
+        self.db = db
+        self.collection_name = collection_name
+        self.change = change
+
+    def __getitem__(self, name):
+        collection = self.db[name]
+        if name != self.collection_name:
+            return collection
+        wrapper = self
+
+        class Collection:
+            def find(self, query, projection=None):
+                cursor = collection.find(query, projection)
+
+                class Cursor:
+                    def limit(self, count):
+                        docs = list(cursor.limit(count))
+                        wrapper.change(collection)
+                        return docs
+
+                    def __iter__(self):
+                        return iter(cursor)
+                return Cursor()
+
+            def __getattr__(self, attr):
+                return getattr(collection, attr)
+        return Collection()
+
+def test_concurrent_change_keeps_document_live():
+    """Test that a todo reopened or edited during archival stays live and unarchived"""
+    print("Testing concurrent changes during archival...")
+
+    db = make_db()
+    seed(db)
+
+    def reopen(todos):
+        todos.update_one({"_id": "done-old"}, {"$set": {"completed": False}})
+    moved = archive_batch(ChangeAfterFind(db, "todos", reopen), "todos",
+                          archive_query("todos", datetime(2026, 9, 19)))
+    assert moved == 1, moved
+    assert db.todos.find_one({"_id": "done-old"})["completed"] is False
+    assert ids(db.todos_archive) == ["done-legacy"]
+
+    def edit(reminders):
+        reminders.update_one({"_id": "expired"}, {"$set": {"title": "moved", "updated_at": RECENT}})
+    moved = archive_batch(ChangeAfterFind(db, "reminders", edit), "reminders",
+                          archive_query("reminders", datetime(2026, 9, 19)))
+    assert moved == 1, moved
+    assert db.reminders.find_one({"_id": "expired"})["title"] == "moved"
+    assert ids(db.reminders_archive) == ["done-recurring"]
+    print("✅ PASS: Documents changed mid-batch stayed live without archived copies")
+
+class ExistingTTLDatabase:
+    """Stand-in for a database whose archives already have a TTL index with another expiry"""
+    def __init__(self):
+        self.commands = []
+        self.dropped = []
+
+    def __getitem__(self, name):
+        db = self
+
+        class Collection:
+            def create_index(self, keys, expireAfterSeconds=None):
+                if expireAfterSeconds is not None:
+                    raise OperationFailure("Index with name archived_at_1 already exists", 85)
+
+            def drop_index(self, index_name):
+                db.dropped.append((name, index_name))
+        return Collection()
+
+    def __getattr__(self, name):
+        return self[name]
+
+    def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+def test_ttl_change_updates_index():
+    """Test that a changed ARCHIVE_TTL_DAYS updates or drops the existing TTL index"""
+    print("Testing TTL index changes...")
+
+    db = ExistingTTLDatabase()
+    ensure_archive_indexes(db, ttl_days=7)
+    assert [args for args, _ in db.commands] == [
+        ("collMod", "reminders_archive"), ("collMod", "todos_archive")
+    ]
+    assert all(kwargs["index"]["expireAfterSeconds"] == 7 * 86400 for _, kwargs in db.commands)
+
+    ensure_archive_indexes(db, ttl_days=0)
+    assert db.dropped == [("reminders_archive", "archived_at_1"), ("todos_archive", "archived_at_1")]
+    print("✅ PASS: TTL expiry updated with collMod and removed when disabled")
+
+def test_lease_is_exclusive_until_it_expires():
+    """Test that one worker at a time holds the retention lease"""
+    print("Testing the retention lease...")
+
+    leases = make_db().job_leases
+    assert acquire_lease(leases, "w1", seconds=60, now=NOW)
+    assert not acquire_lease(leases, "w2", seconds=60, now=NOW + timedelta(seconds=30))
+    assert acquire_lease(leases, "w1", seconds=60, now=NOW + timedelta(seconds=30)), "holder renews"
+    assert not acquire_lease(leases, "w2", seconds=60, now=NOW + timedelta(seconds=80))
+    assert acquire_lease(leases, "w2", seconds=60, now=NOW + timedelta(seconds=91)), "expired lease is free"
+    assert not acquire_lease(leases, "w1", seconds=60, now=NOW + timedelta(seconds=92))
+    print("✅ PASS: Lease held by one worker, taken over after it expired")
+
+def test_run_stops_when_lease_is_lost():
+    """Test that a run stops before the next batch once its lease is lost"""
+    print("Testing runs that lose the lease...")
+
+    db = make_db()
+    db.todos.insert_many([
+        {"_id": f"t{i}", "user_id": "u1", "completed": True, "created_at": OLD, "updated_at": OLD}
+        for i in range(5)
+    ])
+    # Held for the reminders pass and the first todos batch only
+    renewals = iter([True, True])
+    counts = run_retention(db, now=NOW, after_days=30, batch_size=2,
+                           lease=lambda: next(renewals, False))
+
+    assert counts == {"reminders": 0, "todos": 2}, counts
+    assert db.todos.count_documents({}) == 3
+    print("✅ PASS: Run stopped after the lease was lost")
+
+def run_retention_tests():
+    """Run all retention tests"""
+    print("=" * 60)
+    print("Daily Reminder App - Retention Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_archive_query_selection,
+        test_batches_and_on_archive,
+        test_rerun_after_crash,
+        test_concurrent_change_keeps_document_live,
+        test_ttl_change_updates_index,
+        test_lease_is_exclusive_until_it_expires,
+        test_run_stops_when_lease_is_lost
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("RETENTION TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_retention_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Sharding Tests - Consistent hash placement, routing and online rebalancing
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from pymongo.errors import BulkWriteError
+
+from rebalance import MoveAborted, mark_moving, move_user, rebalance
+from sharding import DEFAULT_SHARD, HashRing, ShardRouter, parse_shards
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        if isinstance(condition, dict) and "$in" in condition:
+            if doc.get(field) not in condition["$in"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+class InMemoryCollection:
+    """Local stand-in for the subset of a MongoDB collection the rebalancer uses"""
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, query=None, projection=None):
+        return [dict(doc) for doc in self.docs.values() if _matches(doc, query or {})]
+
+    def insert_many(self, docs, ordered=True):
+        errors = []
+        for doc in docs:
+            doc.setdefault("_id", str(uuid.uuid4()))
+            if doc["_id"] in self.docs:
+                errors.append({"code": 11000, "op": doc})
+            else:
+                self.docs[doc["_id"]] = dict(doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+    def update_one(self, query, update):
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                doc.update(update["$set"])
+                return
+
+    def delete_many(self, query):
+        for _id in [_id for _id, doc in self.docs.items() if _matches(doc, query)]:
+            del self.docs[_id]
+
+class InMemoryDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, InMemoryCollection())
+
+    def __getattr__(self, name):
+        return self[name]
+
+def make_router(shard_names, backends):
+    return ShardRouter(shard_names, lambda name: backends.setdefault(name, InMemoryDatabase()))
+
+def test_parse_shards():
+    """Test parsing of the MONGO_SHARDS setting"""
+    print("Testing shard spec parsing...")
+
+    assert parse_shards(None) == {}
+    assert parse_shards("a=mongodb://h1:27017; b=mongodb://h2:27017") == {
+        "a": "mongodb://h1:27017",
+        "b": "mongodb://h2:27017"
+    }
+    assert parse_shards(
+        "s1=mongodb://a:27017,b:27017/?replicaSet=rs0;s2=mongodb://c:27017,d:27017/?replicaSet=rs1;"
+    ) == {
+        "s1": "mongodb://a:27017,b:27017/?replicaSet=rs0",
+        "s2": "mongodb://c:27017,d:27017/?replicaSet=rs1"
+    }
+    for bad in ("a", "a=mongodb://h1;a=mongodb://h2", f"{DEFAULT_SHARD}=mongodb://h1"):
+        try:
+            parse_shards(bad)
+            assert False, f"{bad!r} should be rejected"
+        except ValueError:
+            pass
+    print("✅ PASS: Shard specs parsed and validated")
+
+def test_ring_balance_and_minimal_movement():
+    """Test that placement is balanced and adding a shard only moves users onto it"""
+    print("Testing consistent hash placement...")
+
+    user_ids = [str(uuid.uuid4()) for _ in range(20000)]
+    before = HashRing(["default", "s1", "s2", "s3"])
+    after = HashRing(["default", "s1", "s2", "s3", "s4"])
+
+    counts = {}
+    for user_id in user_ids:
+        shard = before.shard_for(user_id)
+        counts[shard] = counts.get(shard, 0) + 1
+    for shard, count in counts.items():
+        share = count / len(user_ids)
+        assert 0.15 < share < 0.35, f"{shard} holds {share:.0%} of users"
+
+    moved = [u for u in user_ids if before.shard_for(u) != after.shard_for(u)]
+    assert all(after.shard_for(u) == "s4" for u in moved), "users moved between old shards"
+    assert 0.1 < len(moved) / len(user_ids) < 0.3, f"{len(moved)} users moved"
+    print(f"✅ PASS: Balanced placement, {len(moved) / len(user_ids):.0%} moved to the new shard")
+
+def test_router_uses_pinned_shard():
+    """Test that users are routed to their stored shard, legacy users to the default"""
+    print("Testing shard routing...")
+
+    backends = {}
+    router = make_router(["default", "s1"], backends)
+
+    assert router.db_for({"user_id": "legacy"}) is backends["default"]
+    assert router.db_for({"user_id": "u1", "shard": "s1"}) is backends["s1"]
+    try:
+        router.db("missing")
+        assert False, "unknown shard should raise"
+    except KeyError:
+        pass
+    print("✅ PASS: Users routed to their shard")
+
+def test_concurrent_shard_connect():
+    """Test that concurrent requests connect each shard only once"""
+    print("Testing concurrent shard connections...")
+
+    connects = []
+    def connect(name):
+        connects.append(name)
+        time.sleep(0.05)
+        return object()
+    router = ShardRouter(["default", "s1"], connect)
+
+    start = threading.Barrier(8)
+    results = []
+    def request():
+        start.wait()
+        results.append(router.db("s1"))
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert connects == ["s1"], connects
+    assert len({id(db) for db in results}) == 1
+    print("✅ PASS: 8 concurrent requests shared one shard connection")
+
+def test_rebalance_after_adding_shards():
+    """Test that rebalancing moves exactly the users the new ring places elsewhere"""
+    print("Testing online rebalancing...")
+
+    backends = {}
+    old_router = make_router(["default", "s1"], backends)
+    users = InMemoryCollection()
+    for i in range(200):
+        user_id = str(uuid.uuid4())
+        shard = old_router.placement_for(user_id)
+        users.insert_many([{"user_id": user_id, "shard": shard}])
+        db = old_router.db(shard)
+        db.reminders.insert_many([{"user_id": user_id, "title": f"r{i}"}])
+        db.todos.insert_many([{"user_id": user_id, "title": f"t{i}"}, {"user_id": user_id, "title": "x"}])
+
+    new_router = make_router(["default", "s1", "s2", "s3"], backends)
+    summary = rebalance(new_router, users, log=lambda message: None, grace_seconds=0, batch_size=16)
+
+    assert summary["users"] == 200 and summary["moved"] > 0 and summary["aborted"] == 0
+    assert summary["documents"] == summary["moved"] * 3
+    for user in users.find():
+        assert user["shard"] == new_router.placement_for(user["user_id"])
+        assert not user.get("moving")
+        for name, db in backends.items():
+            expected = 1 if name == user["shard"] else 0
+            assert len(db.reminders.find({"user_id": user["user_id"]})) == expected
+            assert len(db.todos.find({"user_id": user["user_id"]})) == expected * 2
+
+    assert rebalance(new_router, users, log=lambda message: None, grace_seconds=0)["moved"] == 0
+    print(f"✅ PASS: Moved {summary['moved']} of {summary['users']} users, second run moved none")
+
+def test_interrupted_move_can_be_rerun():
+    """Test that a move interrupted after a partial, stale copy completes on re-run"""
+    print("Testing interrupted move recovery...")
+
+    backends = {}
+    router = make_router(["default", "s1"], backends)
+    user_id = next(f"u{i}" for i in range(100) if router.placement_for(f"u{i}") == "s1")
+    users = InMemoryCollection()
+    # The earlier run marked the user and copied an older version of "a"
+    users.insert_many([{"user_id": user_id, "moving": True}])
+    router.db("default").todos.insert_many([
+        {"_id": "a", "user_id": user_id, "completed": True},
+        {"_id": "b", "user_id": user_id, "completed": False}
+    ])
+    router.db("s1").todos.insert_many([{"_id": "a", "user_id": user_id, "completed": False}])
+
+    summary = rebalance(router, users, log=lambda message: None, grace_seconds=0)
+
+    assert summary["moved"] == 1 and summary["documents"] == 2
+    assert sorted(router.db("s1").todos.find(), key=lambda doc: doc["_id"]) == [
+        {"_id": "a", "user_id": user_id, "completed": True},
+        {"_id": "b", "user_id": user_id, "completed": False}
+    ]
+    assert router.db("default").todos.find() == []
+    user = users.find({"user_id": user_id})[0]
+    assert user["shard"] == "s1" and user["moving"] is False
+    print("✅ PASS: Interrupted move completed with current documents")
+
+class WriteDuringCopy(InMemoryDatabase):
+    """Source shard on which a straggling request toggles a todo mid-move"""
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def __getitem__(self, name):
+        collection = super().__getitem__(name)
+        if name != "todos":
+            return collection
+        database = self
+
+        class Todos(InMemoryCollection):
+            def __init__(self):
+                self.docs = collection.docs
+
+            def find(self, query=None, projection=None):
+                docs = collection.find(query, projection)
+                database.reads += 1
+                if database.reads == 1:
+                    collection.update_one({"_id": "a"}, {"$set": {"completed": True}})
+                return docs
+        return Todos()
+
+def test_concurrent_write_aborts_move():
+    """Test that a write landing during the copy aborts the move without losing it"""
+    print("Testing concurrent write during a move...")
+
+    backends = {"default": WriteDuringCopy()}
+    router = make_router(["default", "s1"], backends)
+    users = InMemoryCollection()
+    users.insert_many([{"user_id": "u1"}])
+    router.db("default").todos.insert_many([{"_id": "a", "user_id": "u1", "completed": False}])
+
+    mark_moving(users, ["u1"])
+    try:
+        move_user(router, users, "u1", "default", "s1")
+        assert False, "the move should be aborted"
+    except MoveAborted:
+        pass
+
+    assert router.db("default").todos.find() == [{"_id": "a", "user_id": "u1", "completed": True}]
+    assert router.db("s1").todos.find() == [], "aborted copy should be removed"
+    user = users.find({"user_id": "u1"})[0]
+    assert user.get("shard") is None and user["moving"] is False
+    print("✅ PASS: Move aborted, the concurrent write kept on the source shard")
+
+def test_moving_user_gets_503():
+    """Test that the API refuses requests for a user being moved"""
+    print("Testing requests during a move...")
+
+    from fastapi import HTTPException
+    import server
+
+    try:
+        server.user_db({"user_id": "u1", "moving": True})
+        assert False, "a moving user should be refused"
+    except HTTPException as e:
+        assert e.status_code == 503 and "Retry-After" in e.headers
+    assert server.user_db({"user_id": "u1", "moving": False}) is not None
+    print("✅ PASS: Moving user answered with 503 and Retry-After")
+
+def run_sharding_tests():
+    """Run all sharding tests"""
+    print("=" * 60)
+    print("Daily Reminder App - Sharding Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_parse_shards,
+        test_ring_balance_and_minimal_movement,
+        test_router_uses_pinned_shard,
+        test_concurrent_shard_connect,
+        test_rebalance_after_adding_shards,
+        test_interrupted_move_can_be_rerun,
+        test_concurrent_write_aborts_move,
+        test_moving_user_gets_503
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("SHARDING TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_sharding_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+SQLite Storage Tests - Query translation, atomic updates and index use
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from sqlite_store import SQLiteDatabase
+
+def make_db():
+    return SQLiteDatabase(os.path.join(tempfile.mkdtemp(), "test.db"))
+
+def seed_reminders(db):
+    db.reminders.insert_many([
+        {"reminder_id": "r1", "user_id": "u1", "datetime": "2026-10-18T09:00", "priority": "High", "completed": False, "recurrence": None},
+        {"reminder_id": "r2", "user_id": "u1", "datetime": "2026-10-19T09:00", "priority": "Low", "completed": True, "recurrence": None},
+        {"reminder_id": "r3", "user_id": "u1", "datetime": "2026-10-20T09:00", "priority": "High", "completed": False, "recurrence": "daily"},
+        {"reminder_id": "r4", "user_id": "u2", "datetime": "2026-10-19T12:00", "priority": "High", "completed": False}
+    ])
+
+def ids(docs):
+    return [doc["reminder_id"] for doc in docs]
+
+def test_filters_sort_and_projection():
+    """Test that the filter operators used by the API match like MongoDB"""
+    print("Testing filter translation...")
+
+    db = make_db()
+    seed_reminders(db)
+    reminders = db.reminders
+
+    assert ids(reminders.find({"user_id": "u1"}).sort("datetime", -1)) == ["r3", "r2", "r1"]
+    assert ids(reminders.find({"user_id": "u1", "datetime": {"$gte": "2026-10-19", "$lt": "2026-10-20"}})) == ["r2"]
+    assert ids(reminders.find({"user_id": "u1", "completed": {"$ne": True}}).sort("datetime", 1)) == ["r1", "r3"]
+    assert ids(reminders.find({"reminder_id": {"$in": ["r1", "r4", "x"]}}).sort("reminder_id", 1)) == ["r1", "r4"]
+    assert ids(reminders.find({"recurrence": None}).sort("reminder_id", 1)) == ["r1", "r2", "r4"], "missing matches None"
+    assert ids(reminders.find({"recurrence": {"$exists": False}})) == ["r4"]
+    assert ids(reminders.find({"$or": [{"priority": "Low"}, {"user_id": "u2"}]}).sort("datetime", 1)) == ["r2", "r4"]
+    assert ids(reminders.find({"user_id": "u1"}).sort("datetime", 1).limit(2)) == ["r1", "r2"]
+    assert reminders.count_documents({"user_id": "u1", "priority": "High"}) == 2
+
+    doc = reminders.find_one({"reminder_id": "r1"}, {"_id": 0})
+    assert "_id" not in doc and doc["priority"] == "High"
+    assert reminders.find_one({"reminder_id": "r1"}, {"_id": 0, "title": 1, "priority": 1}) == {"priority": "High"}
+    doc_id = reminders.find_one({"reminder_id": "r1"})["_id"]
+    assert reminders.find_one({"reminder_id": "r1"}, {"_id": 1}) == {"_id": doc_id}
+    assert reminders.find_one({"user_id": "u1"}, sort=[("datetime", -1)])["reminder_id"] == "r3"
+    assert reminders.find_one({"user_id": "nobody"}) is None
+    print("✅ PASS: Filters, sorts and projections match MongoDB")
+
+def test_writes_and_duplicate_keys():
+    """Test insert/update/delete results and duplicate _id errors"""
+    print("Testing writes...")
+
+    db = make_db()
+    doc = {"todo_id": "t1", "user_id": "u1", "completed": False}
+    db.todos.insert_one(doc)
+    assert "_id" in doc, "insert_one sets _id on the document like pymongo"
+    try:
+        db.todos.insert_one(dict(doc))
+        assert False, "duplicate _id should raise"
+    except DuplicateKeyError:
+        pass
+    try:
+        db.todos.insert_many([{"_id": "new"}, dict(doc), {"_id": "other"}], ordered=False)
+        assert False, "duplicate _id should raise"
+    except BulkWriteError as e:
+        assert [err["code"] for err in e.details["writeErrors"]] == [11000]
+        assert e.details["nInserted"] == 2
+
+    result = db.todos.update_one({"todo_id": "t1"}, {"$set": {"title": "Milk"}})
+    assert result.matched_count == 1
+    assert db.todos.update_one({"todo_id": "missing"}, {"$set": {"title": "x"}}).matched_count == 0
+    assert db.todos.find_one({"todo_id": "t1"})["title"] == "Milk"
+
+    assert db.todos.delete_one({"todo_id": "missing"}).deleted_count == 0
+    assert db.todos.delete_many({"_id": {"$in": ["new", "other"]}}).deleted_count == 2
+    assert db.todos.delete_one({"todo_id": "t1"}).deleted_count == 1
+    assert db.todos.count_documents({}) == 0
+    print("✅ PASS: Writes and duplicate key errors behave like pymongo")
+
+def test_concurrent_toggles_are_atomic():
+    """Test that pipeline toggles from many threads never lose an update"""
+    print("Testing atomic toggle...")
+
+    db = make_db()
+    db.todos.insert_one({"todo_id": "t1", "user_id": "u1", "completed": False})
+
+    def toggle():
+        for _ in range(25):
+            db.todos.find_one_and_update(
+                {"todo_id": "t1", "user_id": "u1"},
+                [{"$set": {"completed": {"$not": "$completed"}}}],
+                return_document=ReturnDocument.AFTER
+            )
+
+    threads = [threading.Thread(target=toggle) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 100 toggles in total: back to the starting value
+    assert db.todos.find_one({"todo_id": "t1"})["completed"] is False
+
+    after = db.todos.find_one_and_update(
+        {"todo_id": "t1"}, [{"$set": {"completed": {"$not": "$completed"}}}],
+        projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    assert after == {"todo_id": "t1", "user_id": "u1", "completed": True}
+    before = db.todos.find_one_and_update({"todo_id": "t1"}, {"$set": {"title": "x"}})
+    assert "title" not in before, "default returns the document before the update"
+    db.close()
+    print("✅ PASS: 100 concurrent toggles applied without lost updates")
+
+def test_counts_aggregation():
+    """Test the grouped per-priority counts pipeline"""
+    print("Testing counts aggregation...")
+
+    db = make_db()
+    seed_reminders(db)
+    now = "2026-10-19T10:00"
+    rows = db.reminders.aggregate([
+        {"$match": {"user_id": "u1"}},
+        {"$group": {
+            "_id": "$priority",
+            "total": {"$sum": 1},
+            "upcoming": {"$sum": {"$cond": [{"$gte": ["$datetime", now]}, 1, 0]}},
+            "overdue": {"$sum": {"$cond": [{"$and": [
+                {"$lt": ["$datetime", now]},
+                {"$ne": ["$completed", True]}
+            ]}, 1, 0]}}
+        }}
+    ])
+    by_priority = {row.pop("_id"): row for row in rows}
+    assert by_priority == {
+        "High": {"total": 2, "upcoming": 1, "overdue": 1},
+        "Low": {"total": 1, "upcoming": 0, "overdue": 0}
+    }
+    print("✅ PASS: Counts grouped per priority")
+
+def test_indexes_and_wal():
+    """Test that list queries use the expression indexes and WAL is enabled"""
+    print("Testing indexes and journal mode...")
+
+    db = make_db()
+    db.reminders.create_index([("user_id", 1), ("datetime", 1)])
+    conn = db.connection("reminders")
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT _id, doc FROM reminders "
+        "WHERE json_extract(doc, '$.user_id') = ? ORDER BY json_extract(doc, '$.datetime') ASC",
+        ["u1"]
+    ).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "USING INDEX reminders.user_id_1_datetime_1" in detail, detail
+    assert "TEMP B-TREE" not in detail, "sort should be served by the index"
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    try:
+        list(db.reminders.find({"user_id') OR 1=1 --": "x"}))
+        assert False, "unsafe field names should be rejected"
+    except ValueError:
+        pass
+    print("✅ PASS: Queries use indexes, database in WAL mode")
+
+def run_sqlite_tests():
+    """Run all SQLite storage tests"""
+    print("=" * 60)
+    print("Daily Reminder App - SQLite Storage Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_filters_sort_and_projection,
+        test_writes_and_duplicate_keys,
+        test_concurrent_toggles_are_atomic,
+        test_counts_aggregation,
+        test_indexes_and_wal
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("SQLITE TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_sqlite_tests()
+    sys.exit(0 if success else 1)
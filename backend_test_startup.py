@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Backend Startup Tests - Import time budget and lazy initialization
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# Importing server.py must stay well under this many seconds on a cold start
+IMPORT_TIME_BUDGET = 2.0
+
+def run_in_backend(code, env=None):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env=dict(os.environ, **(env or {})),
+    )
+
+def test_import_time_budget():
+    """Test that importing the server module stays under the time budget"""
+    print("Testing server import time...")
+
+    started = time.perf_counter()
+    result = run_in_backend("import server")
+    elapsed = time.perf_counter() - started
+
+    assert result.returncode == 0, result.stderr
+    assert elapsed < IMPORT_TIME_BUDGET, f"import took {elapsed:.2f}s (budget {IMPORT_TIME_BUDGET}s)"
+    print(f"✅ PASS: Server imported in {elapsed:.2f}s (budget {IMPORT_TIME_BUDGET}s)")
+
+def test_heavy_dependencies_are_lazy():
+    """Test that pymongo, passlib and jose are not imported with the server module"""
+    print("Testing lazy import of heavy dependencies...")
+
+    result = run_in_backend(
+        "import sys, server\n"
+        "print(','.join(m for m in ('pymongo', 'passlib', 'jose', 'requests') if m in sys.modules))"
+    )
+
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.strip()
+    assert loaded == "", f"eagerly imported: {loaded}"
+    print("✅ PASS: No heavy dependency imported at module import")
+
+def test_startup_report():
+    """Test that --startup-report prints a timing line per component"""
+    print("Testing --startup-report output...")
+
+    result = subprocess.run(
+        [sys.executable, "server.py", "--startup-report"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    for component in ("fastapi/pydantic", "jose", "passlib/bcrypt", "pymongo", "total"):
+        assert component in result.stdout, f"missing {component} in report"
+    print("✅ PASS: Startup report lists every component")
+
+INDEX_RETRY_SCRIPT = """
+import asyncio, sharding, server, sqlite_store
+attempts = []
+def connect(name):
+    if name == "s1" and len(attempts) < 3:
+        attempts.append(name)
+        raise ConnectionError("s1 unavailable")
+    return sqlite_store.SQLiteDatabase(server.get_db().path + "." + name)
+server.shard_router = sharding.ShardRouter(["default", "s1", "s2"], connect)
+try:
+    server.ensure_indexes()
+    raise SystemExit("ensure_indexes should fail while s1 is down")
+except RuntimeError as e:
+    print(e)
+s2 = server.shard_router.db("s2").connection()
+print(len(s2.execute("SELECT name FROM sqlite_master WHERE name LIKE 'todos.%'").fetchall()))
+asyncio.run(asyncio.wait_for(server.ensure_indexes_with_retry(max_delay=0.01), 10))
+print(len(attempts))
+"""
+
+def test_index_creation_retries():
+    """Test that a failing shard does not stop the others and is retried"""
+    print("Testing index creation retry...")
+
+    result = run_in_backend(INDEX_RETRY_SCRIPT, env={
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(tempfile.mkdtemp(), "startup.db")
+    })
+
+    assert result.returncode == 0, result.stderr
+    error, s2_indexes, attempts = result.stdout.split("\n")[:3]
+    assert error == "Index creation failed for: s1", error
+    assert int(s2_indexes) > 0, "shard after the failing one got no indexes"
+    assert attempts == "3", "s1 should be retried until it is reachable"
+    print("✅ PASS: Other shards indexed, failing shard retried until it succeeded")
+
+CONCURRENT_INIT_SCRIPT = """
+import threading, time, server, sqlite_store
+from passlib import context
+created = []
+def counting(cls):
+    class Counting(cls):
+        def __init__(self, *args, **kwargs):
+            created.append(cls.__name__)
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+    return Counting
+sqlite_store.SQLiteDatabase = counting(sqlite_store.SQLiteDatabase)
+context.CryptContext = counting(context.CryptContext)
+results = []
+start = threading.Barrier(8)
+def request():
+    start.wait()
+    results.append((server.get_db(), server.get_pwd_context()))
+threads = [threading.Thread(target=request) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(sorted(created))
+print(len({id(db) for db, _ in results}), len({id(pwd) for _, pwd in results}))
+"""
+
+def test_concurrent_lazy_initialization():
+    """Test that concurrent first requests create the database and hasher only once"""
+    print("Testing concurrent lazy initialization...")
+
+    result = run_in_backend(CONCURRENT_INIT_SCRIPT, env={
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(tempfile.mkdtemp(), "startup.db")
+    })
+
+    assert result.returncode == 0, result.stderr
+    created, distinct = result.stdout.split("\n")[:2]
+    assert created == "['CryptContext', 'SQLiteDatabase']", created
+    assert distinct == "1 1", distinct
+    print("✅ PASS: 8 concurrent first calls shared one database and one hasher")
+
+def run_startup_tests():
+    """Run all startup tests"""
+    print("=" * 60)
+    print("Daily Reminder App - Backend Startup Tests")
+    print("=" * 60)
+    print()
+
+    tests = [
+        test_import_time_budget,
+        test_heavy_dependencies_are_lazy,
+        test_startup_report,
+        test_index_creation_retries,
+        test_concurrent_lazy_initialization
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+        print()
+
+    print("=" * 60)
+    print("STARTUP TEST SUMMARY")
+    print("=" * 60)
+    print(f"Total Tests: {passed + failed}")
+    print(f"Passed: {passed}")
+    print(f"Failed: {failed}")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_startup_tests()
+    sys.exit(0 if success else 1)
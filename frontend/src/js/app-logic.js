@@ -1012,21 +1012,16 @@ class DailyReminderApp {
     if (!todo) return;
     
     try {
-      const response = await fetch(`${API_BASE_URL}/api/todos/${id}`, {
-        method: 'PUT',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.authToken}`
-        },
-        body: JSON.stringify({
-          title: todo.title,
-          description: todo.description,
-          completed: !todo.completed
-        })
+      const response = await fetch(`${API_BASE_URL}/api/todos/${id}/toggle`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${this.authToken}` }
       });
       
       if (response.ok) {
-        this.loadTodos();
+        const data = await response.json();
+        Object.assign(todo, data.todo);
+        this.updateTodoDisplays();
+        if (this.currentView === 'todos') this.renderTodosList();
       } else {
         throw new Error('Failed to update task');
       }